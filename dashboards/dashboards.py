@@ -1,39 +1,33 @@
 import streamlit as st
-import requests
 import json
 from streamlit_ace import st_ace
-
-# Function to list dashboards
-def list_dashboards(access_token, instance_url):
-    url = f"{instance_url}/services/data/v60.0/analytics/dashboards"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(url, headers=headers)
-    return response.json() if response.status_code == 200 else {"error": response.text}
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit import dashboards as dashboard_api
+from sfkit.listing import build_index, load_index
+from sfkit.ui import render_listing
+
+
+# Function to list dashboards (every dashboard in the org, from the local index unless rebuilt)
+def list_dashboards(access_token, instance_url, rebuild=False, progress=None):
+    try:
+        index = None if rebuild else load_index(access_token, instance_url, "dashboards")
+        return index or build_index(access_token, instance_url, "dashboards", progress=progress)
+    except Exception as e:
+        return {"error": str(e)}
 
 # Function to get dashboard results
 def get_dashboard_results(access_token, instance_url, dashboard_id):
-    url = f"{instance_url}/services/data/v60.0/analytics/dashboards/{dashboard_id}"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(url, headers=headers)
-    return response.json() if response.status_code == 200 else {"error": response.text}
+    return dashboard_api.get_results(access_token, instance_url, dashboard_id)
 
 # Function to get dashboard metadata
-def get_dashboard_metadata(access_token, instance_url, dashboard_id):
-    url = f"{instance_url}/services/data/v60.0/analytics/dashboards/{dashboard_id}/describe"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(url, headers=headers)
-    return response.json() if response.status_code == 200 else {"error": response.text}
+def get_dashboard_metadata(access_token, instance_url, dashboard_id, force_refresh=False):
+    return dashboard_api.get_metadata(access_token, instance_url, dashboard_id, force_refresh=force_refresh)
 
 # Function to download dashboard as PNG
 def download_dashboard_png(access_token, instance_url, dashboard_id):
-    url = f"{instance_url}/analytics/download/lightning-dashboard/{dashboard_id}.png"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(url, headers=headers, stream=True)
-
-    if response.status_code == 200:
-        return response.content  # Binary content for PNG
-    else:
-        return {"error": f"Error: {response.status_code} - {response.text}"}
+    return dashboard_api.download_png(access_token, instance_url, dashboard_id)
 
 # Streamlit UI
 st.title("📊 Salesforce Dashboard Utility")
@@ -47,30 +41,31 @@ instance_url = st.text_input("🌐 Instance URL", value="https://your-instance.s
 option = st.radio("Select an action:", [
     "List All Dashboards",
     "Get Dashboard Results",
-    "Get Dashboard Metadata"
+    "Get Dashboard Metadata",
+    "Full Dashboard Snapshot"
 ])
 
-if option != "List All Dashboards":
+if option == "List All Dashboards":
+    rebuild_index = st.checkbox("🔄 Rebuild the local dashboard index", value=False,
+                                help="The first listing downloads every dashboard page by page; later ones reuse the saved index.")
+else:
     dashboard_id = st.text_input("📊 Dashboard ID", "")
 
+if option in ("Get Dashboard Metadata", "Full Dashboard Snapshot"):
+    # Metadata endpoints are served from the on-disk cache unless refreshed
+    force_refresh = st.checkbox("🔄 Force refresh (bypass the metadata cache)", value=False)
+
 if st.button("Execute"):
     if access_token and instance_url:
         if option == "List All Dashboards":
-            dashboards = list_dashboards(access_token, instance_url)
-
-            # Display JSON
-            st.subheader("📋 List of Dashboards (JSON)")
-            json_text = json.dumps(dashboards, indent=4)
-             # JSON Download
-            st.download_button(
-                label="📥 Download JSON",
-                data=json_text,
-                file_name="list_of_dashboards.json",
-                mime="application/json"
-            )
-            st_ace(value=json_text, language="json", theme="monokai", readonly=True)
-
-           
+            progress = st.empty()
+            dashboards = list_dashboards(access_token, instance_url, rebuild_index,
+                                         progress=lambda count: progress.caption(f"Indexed {count} dashboards..."))
+            progress.empty()
+            if isinstance(dashboards, dict):
+                st.error(dashboards["error"])
+            else:
+                st.session_state["dashboard_index"] = dashboards
 
         elif dashboard_id:
             if option == "Get Dashboard Results":
@@ -91,7 +86,7 @@ if st.button("Execute"):
 
 
             elif option == "Get Dashboard Metadata":
-                metadata = get_dashboard_metadata(access_token, instance_url, dashboard_id)
+                metadata = get_dashboard_metadata(access_token, instance_url, dashboard_id, force_refresh)
 
                 # Display JSON
                 st.subheader("📑 Dashboard Metadata (JSON)")
@@ -107,6 +102,30 @@ if st.button("Execute"):
                 st_ace(value=json_text, language="json", theme="monokai", readonly=True)
 
 
+            elif option == "Full Dashboard Snapshot":
+                # Results, describe and PNG are fetched concurrently; the PNG is reused until the dashboard is refreshed
+                snapshot = dashboard_api.fetch_snapshot(access_token, instance_url, dashboard_id, force_refresh=force_refresh)
+                png_source = "cached render" if snapshot.png_cached else "downloaded"
+                st.caption(f"Fetched in {snapshot.seconds:.2f}s (PNG {png_source}).")
+                for name, error in snapshot.errors.items():
+                    st.error(f"{name}: {error}")
+
+                if snapshot.png is not None:
+                    st.subheader("📸 Dashboard PNG Preview")
+                    st.image(snapshot.png, caption="Dashboard")
+                    st.download_button(
+                        label="📥 Download PNG",
+                        data=snapshot.png,
+                        file_name=f"dashboard_{dashboard_id}.png",
+                        mime="image/png"
+                    )
+                with st.expander("📊 Dashboard Results (JSON)"):
+                    st_ace(value=json.dumps(snapshot.results, indent=4), language="json", theme="monokai",
+                           readonly=True, key="snapshot_results")
+                with st.expander("📑 Dashboard Metadata (JSON)"):
+                    st_ace(value=json.dumps(snapshot.metadata, indent=4), language="json", theme="monokai",
+                           readonly=True, key="snapshot_metadata")
+
             elif option == "Download Dashboard as PNG":
                 png_data = download_dashboard_png(access_token, instance_url, dashboard_id)
 
@@ -126,4 +145,9 @@ if st.button("Execute"):
         else:
             st.warning("⚠️ Please enter a valid Dashboard ID.")
     else:
-        st.warning("⚠️ Please enter Access Token and Instance URL.")
\ No newline at end of file
+        st.warning("⚠️ Please enter Access Token and Instance URL.")
+
+# The dashboard index stays browsable across reruns (search, paging) without pressing Execute again
+if option == "List All Dashboards" and st.session_state.get("dashboard_index") is not None:
+    st.subheader("📋 List of Dashboards")
+    render_listing(st.session_state["dashboard_index"], "dashboards")
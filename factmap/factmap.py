@@ -1,28 +1,28 @@
 import streamlit as st
-import requests
 import json
 import pandas as pd
 from streamlit_ace import st_ace
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.client import api_get
+from sfkit.factmap import column_types, detail_frame
 
 # Function to fetch report data from Salesforce
 def get_report_data(access_token, instance_url, report_id, api_version="60.0"):
     url = f"{instance_url}/services/data/v{api_version}/analytics/reports/{report_id}?includeDetails=true"
-    headers = {"Authorization": f"Bearer {access_token}"}
     
-    response = requests.get(url, headers=headers)
+    response = api_get(access_token, instance_url, url)
     return response.json() if response.status_code == 200 else {"error": response.text}
 
 # Function to parse Fact Map and structure it as a DataFrame
-def parse_fact_map(fact_map, detail_columns, report_format):
+def parse_fact_map(fact_map, detail_columns, report_format, types=None):
     data_rows = []
 
     if report_format == "TABULAR":
-        for key, section in fact_map.items():
-            for row in section.get("rows", []):
-                row_data = {detail_columns[i]: cell.get("value", "-") for i, cell in enumerate(row["dataCells"])}
-                data_rows.append(row_data)
+        return detail_frame(fact_map, detail_columns, types=types)  # Typed columnar build, no per-row dicts
 
-    elif report_format in ["SUMMARY", "MATRIX"]:
+    if report_format in ["SUMMARY", "MATRIX"]:
         for key, section in fact_map.items():
             if key.endswith("!T"):  # Summary Data
                 row_data = {"Grouping": key.replace("!T", ""), "Aggregates": section["aggregates"]}
@@ -60,7 +60,7 @@ if st.button("Fetch Report Data"):
             st.subheader(f"🔹 Report Type: {report_format}")
 
             # Parse Fact Map into DataFrame
-            df = parse_fact_map(fact_map, detail_columns, report_format)
+            df = parse_fact_map(fact_map, detail_columns, report_format, column_types(data))
 
             if df is not None:
                 st.dataframe(df)  # Render as a table
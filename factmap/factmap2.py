@@ -1,124 +1,302 @@
 import streamlit as st
-import requests
 import json
+import time
 import pandas as pd
 from streamlit_ace import st_ace
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.client import api_get, api_url
+from sfkit.httpcache import cached_get
+from sfkit.fetch import DEFAULT_CONCURRENCY, parse_report_ids
+from sfkit.instances import AsyncReportJob
+from sfkit.reportstore import get_report_store
+from sfkit.rollup import RollupCube, parse_fact_map
+from sfkit.factmap import column_types, grouping_labels
+from sfkit.factmap_stream import StreamedReport, iter_report, open_report_stream
+from sfkit.ui import render_fetch_results, render_governor_sidebar, render_multi_fetch, render_parquet_downloads
+
+ASYNC_REFRESH_SECONDS = 2
+STREAM_KEEP_ROWS = 5000  # detail rows of a streamed report kept for display; the rest only pass through
+DESCRIBE_TTL = 3600
+HISTORY_DAYS = [7, 30, 90, 365]
+
+# Snapshots of fetched / uploaded reports for trend analysis across runs
+report_store = get_report_store()
 
 # Function to fetch report data from Salesforce
 def get_report_data(access_token, instance_url, report_id, api_version="60.0"):
     url = f"{instance_url}/services/data/v{api_version}/analytics/reports/{report_id}?includeDetails=true"
-    headers = {"Authorization": f"Bearer {access_token}"}
     
-    response = requests.get(url, headers=headers)
+    response = api_get(access_token, instance_url, url)
     return response.json() if response.status_code == 200 else {"error": response.text}
 
-# Function to extract aggregates properly
-def extract_aggregates(aggregates):
-    return ", ".join([str(agg.get("value", "-")) for agg in aggregates])  # Extract and join values
-
-# Function to parse Fact Map and structure it as a DataFrame
-def parse_fact_map(fact_map, detail_columns, report_format):
-    data_rows = []
-
-    if report_format == "TABULAR":
-        for key, section in fact_map.items():
-            for row in section.get("rows", []):
-                row_data = {detail_columns[i]: cell.get("value", "-") for i, cell in enumerate(row["dataCells"])}
-                data_rows.append(row_data)
-
-    elif report_format == "SUMMARY":
-        for key, section in fact_map.items():
-            if key.endswith("!T"):  # Summary Data
-                row_data = {
-                    "Grouping": key.replace("!T", ""), 
-                    "Aggregates": extract_aggregates(section["aggregates"])  # Fix the aggregate display
-                }
-                data_rows.append(row_data)
-
-    elif report_format == "MATRIX":
-        for key, section in fact_map.items():
-            row_col = key.split("!")
-            row_group = row_col[0]
-            col_group = row_col[1] if len(row_col) > 1 else "T"
-            row_data = {
-                "Row Group": row_group,
-                "Column Group": col_group,
-                "Aggregates": extract_aggregates(section["aggregates"])  # Fix the aggregate display
-            }
-            data_rows.append(row_data)
-
-    return pd.DataFrame(data_rows) if data_rows else None
+# Function to drill up / down a SUMMARY or MATRIX report: one aggregate at chosen grouping levels
+def render_rollup(data, cube, key):
+    if not cube.aggregates:
+        return
+    st.subheader("🧮 Rollup")
+    col1, col2, col3 = st.columns(3)
+    aggregate = col1.selectbox("Aggregate", cube.aggregates, key=f"{key}_rollup_aggregate")
+    row_depth = col2.selectbox("Row level", range(cube.max_depth("row") + 1), index=min(1, cube.max_depth("row")),
+                               format_func=lambda d: "Total" if d == 0 else f"Level {d}", key=f"{key}_rollup_rows")
+    col_depth = col3.selectbox("Column level", range(cube.max_depth("col") + 1), index=min(1, cube.max_depth("col")),
+                               format_func=lambda d: "Total" if d == 0 else f"Level {d}", key=f"{key}_rollup_cols")
+    st.dataframe(cube.level(
+        row_depth, col_depth, aggregate,
+        row_labels=grouping_labels(data, "groupingsDown"),
+        column_labels=grouping_labels(data, "groupingsAcross")
+    ))
+
+# Function to parse a report response into its table and, for grouped reports, its rollup cube
+def parse_report(data, detail_columns=None):
+    metadata = data.get("reportMetadata", {})
+    report_format = metadata.get("reportFormat", "UNKNOWN")
+    cube = RollupCube.from_report(data) if report_format in ("SUMMARY", "MATRIX") else None
+    columns = metadata.get("detailColumns", []) if detail_columns is None else detail_columns
+    return parse_fact_map(data.get("factMap", {}), columns, report_format, column_types(data), cube), cube
+
+# Function to read a report's detail column names from its (cached) describe, for naming the streamed preview
+def describe_columns(access_token, instance_url, report_id):
+    try:
+        url = api_url(instance_url, "60.0", f"analytics/reports/{report_id}/describe")
+        response = cached_get(access_token, instance_url, url, ttl=DESCRIBE_TTL)
+        if response.status_code == 200:
+            return response.json().get("reportMetadata", {}).get("detailColumns")
+    except Exception:
+        pass
+    return None
+
+# Function to parse a report incrementally, showing the first rows while the rest is still arriving.
+# Only STREAM_KEEP_ROWS rows are kept; every batch also goes to `writer` (a report store SnapshotWriter) if given.
+def stream_report(fileobj, writer=None, columns=None):
+    streamed = StreamedReport(keep_rows=STREAM_KEEP_ROWS)
+    status = st.empty()
+    table = st.empty()
+    for kind, name, payload in iter_report(fileobj):
+        streamed.add(kind, name, payload)
+        if writer is not None:
+            writer.add(kind, name, payload)
+        if kind == "rows":
+            if streamed.row_count == len(payload):  # first batch
+                # factMap comes before reportMetadata, so the names come from the describe call if at all
+                columns = columns or streamed.metadata.get("detailColumns")
+                table.dataframe(pd.DataFrame(payload, columns=columns if columns and len(columns) == len(payload[0]) else None))
+            status.caption(f"⏳ {streamed.row_count} rows received...")
+    status.caption(f"✅ {streamed.row_count} rows streamed.")
+    table.empty()  # render_report shows the parsed table in its place
+    return streamed
+
+# Function to stream a report and, if asked, save it to the local store batch by batch in one transaction
+def stream_and_save(fileobj, save, columns=None):
+    if not save:
+        return stream_report(fileobj, columns=columns)
+    streamed = None
+    try:
+        with report_store.writer() as writer:
+            streamed = stream_report(fileobj, writer, columns)
+    except Exception as e:
+        if streamed is None:  # the report itself failed; nothing was stored
+            raise
+        st.warning(f"⚠️ Snapshot not saved: {str(e)}")
+    else:
+        st.caption(f"💾 Saved as snapshot #{writer.snapshot_id} in the local report store.")
+    return streamed
+
+# Function to keep what render_report needs from a streamed report (the response minus its rows, plus the kept rows)
+def streamed_result(streamed):
+    data = streamed.report
+    result = {"data": data, "streamed": True, "row_count": streamed.row_count}
+    if data.get("reportMetadata", {}).get("reportFormat") == "TABULAR":
+        return {**result, "df": streamed.frame(), "cube": None, "details": None}
+    df, cube = parse_report(data, detail_columns=[])
+    return {**result, "df": df, "cube": cube, "details": streamed.frame()}
+
+# Function to keep what render_report needs from a full report response
+def parsed_result(data):
+    df, cube = parse_report(data)
+    return {"data": data, "df": df, "cube": cube, "details": None, "streamed": False}
+
+# Function to describe how much of a streamed report's detail rows are on screen
+def shown_rows(result, frame):
+    if len(frame) < result["row_count"]:
+        return f"first {len(frame)} of {result['row_count']}"
+    return str(len(frame))
+
+# Function to show a parsed report: JSON view, table, drill-down and Parquet downloads (the last two need the full response)
+def render_report(result, key):
+    data = result["data"]
+    if not result["streamed"]:
+        st_ace(value=json.dumps(data, indent=4), language="json", theme="monokai", readonly=True, key=f"{key}_json")
+    st.subheader(f"🔹 Report Type: {data.get('reportMetadata', {}).get('reportFormat', 'UNKNOWN')}")
+    if result["df"] is not None:
+        if result["streamed"] and result["details"] is None:
+            st.caption(f"📄 Detail rows: {shown_rows(result, result['df'])}")
+        st.dataframe(result["df"])  # Render as a table
+        if result["details"] is not None:
+            with st.expander(f"📄 Detail rows ({shown_rows(result, result['details'])})"):
+                st.dataframe(result["details"])
+        if result["cube"] is not None:
+            render_rollup(data, result["cube"], key)
+        if not result["streamed"]:
+            render_parquet_downloads(data, key)
+    else:
+        st.warning("⚠️ No report data available for rendering.")
+
+# Function to keep a snapshot of a parsed report in the local store
+def save_snapshot(data, rows=None):
+    try:
+        snapshot_id = report_store.ingest(data, rows)
+        st.caption(f"💾 Saved as snapshot #{snapshot_id} in the local report store.")
+    except Exception as e:
+        st.warning(f"⚠️ Snapshot not saved: {str(e)}")
+
+# Function to compare a stored report's latest snapshot with its history
+def render_history():
+    reports = report_store.reports()
+    if reports.empty:
+        st.info("No snapshots yet. Tick \"Save a snapshot\" when fetching or uploading a report.")
+        return
+    names = dict(zip(reports["report_id"], reports["report_name"].fillna("")))
+    report_id = st.selectbox("📄 Report", list(names), format_func=lambda rid: f"{names[rid]} ({rid})",
+                             key="history_report")
+    aggregates = report_store.aggregate_names(report_id)
+    if not aggregates:
+        st.warning("⚠️ The stored snapshots of this report have no aggregates.")
+        return
+    col1, col2 = st.columns(2)
+    aggregate = col1.selectbox("Aggregate", aggregates, key="history_aggregate")
+    days = col2.selectbox("Compare with the last ... days", HISTORY_DAYS, index=1, key="history_days")
+
+    st.subheader("📊 Latest Snapshot vs. History")
+    st.dataframe(report_store.compare_to_history(report_id, aggregate, days), hide_index=True)
+
+    st.subheader("📈 Trend")
+    history = report_store.aggregate_history(report_id, aggregate, since=time.time() - days * 24 * 3600)
+    if not history.empty:
+        st.line_chart(history.pivot_table(index="taken_at", columns="row_group", values="value"))
+    with st.expander("🗂️ Snapshots"):
+        st.dataframe(report_store.snapshots(report_id), hide_index=True)
+
+# Function to show progress of the background async job (wrapped in an auto-refreshing fragment while it runs)
+def render_async_job():
+    job = st.session_state.get("async_job")
+    if job is None:
+        return
+    results = job.snapshot()
+    if not job.done:
+        st.progress(len(results) / len(job.report_ids),
+                    text=f"{len(results)}/{len(job.report_ids)} instances finished · {job.elapsed():.0f}s elapsed")
+        return
+    if st.session_state.get("async_polling"):
+        # Finished while the fragment was polling; rerun the page once to stop the timer
+        st.session_state["async_polling"] = False
+        st.rerun()
+    render_fetch_results(results, job.elapsed())  # parsed by the job as each report finished
 
 # Streamlit UI
 st.title("📊 Salesforce Report Viewer")
 st.markdown("Enter your credentials to fetch and visualize reports, or upload a JSON file.")
 
 # Tabs for Fetching & Uploading
-tab1, tab2 = st.tabs(["🔄 Fetch Report", "📂 Upload JSON"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["🔄 Fetch Report", "📂 Upload JSON", "📚 Fetch Many", "⏳ Async Runs", "📈 History"])
 
 with tab1:
     # User Inputs
     access_token = st.text_input("🔑 Access Token", type="password")
     instance_url = st.text_input("🌐 Instance URL", "https://your-instance.salesforce.com")
     report_id = st.text_input("📄 Report ID", "")
+    stream_fetch = st.checkbox("🌊 Stream the response (large reports)", value=False, key="fetch_stream",
+                               help="Parses the report while it downloads; the JSON view and Parquet export are skipped.")
+    save_fetch = st.checkbox("💾 Save a snapshot to the local report store", value=False, key="fetch_save")
     
     if st.button("Fetch Report Data"):
-        if access_token and instance_url and report_id:
+        st.session_state.pop("fetched", None)
+        if access_token and instance_url and report_id and stream_fetch:
+            try:
+                columns = describe_columns(access_token, instance_url, report_id)
+                with open_report_stream(access_token, instance_url, report_id) as body:
+                    streamed = stream_and_save(body, save_fetch, columns)
+                st.session_state["fetched"] = streamed_result(streamed)
+            except Exception as e:
+                st.error(f"⚠️ Error: {str(e)}")
+        elif access_token and instance_url and report_id:
             data = get_report_data(access_token, instance_url, report_id)
 
             if "error" in data:
                 st.error(f"⚠️ Error: {data['error']}")
             else:
                 st.success("✅ Report data fetched successfully!")
-
-                # Display JSON data
-                json_text = json.dumps(data, indent=4)
-                st_ace(value=json_text, language="json", theme="monokai", readonly=True)
-
-                # Extract Fact Map Data
-                fact_map = data.get("factMap", {})
-                detail_columns = data.get("reportMetadata", {}).get("detailColumns", [])
-                report_format = data.get("reportMetadata", {}).get("reportFormat", "UNKNOWN")
-
-                st.subheader(f"🔹 Report Type: {report_format}")
-
-                # Parse Fact Map into DataFrame
-                df = parse_fact_map(fact_map, detail_columns, report_format)
-
-                if df is not None:
-                    st.dataframe(df)  # Render as a table
-                else:
-                    st.warning("⚠️ No report data available for rendering.")
+                st.session_state["fetched"] = parsed_result(data)
+                if save_fetch:
+                    save_snapshot(data)
         else:
             st.warning("⚠️ Please enter all required fields.")
 
+    # Rendered outside the button branch: the drill-down widgets rerun the script, and st.button is False then
+    if st.session_state.get("fetched"):
+        render_report(st.session_state["fetched"], "fetch")
+
 with tab2:
     # Upload JSON File
     uploaded_file = st.file_uploader("📤 Upload a JSON file", type="json")
+    stream_upload = st.checkbox("🌊 Stream the file (large reports)", value=False, key="upload_stream",
+                                help="Parses the file incrementally; the JSON view and Parquet export are skipped.")
+    save_upload = st.checkbox("💾 Save a snapshot to the local report store", value=False, key="upload_save",
+                              help="Saved once per uploaded file.")
 
-    if uploaded_file is not None:
+    if uploaded_file is not None and stream_upload:
+        try:
+            save = save_upload and st.session_state.get("saved_upload") != uploaded_file.file_id
+            streamed = stream_and_save(uploaded_file, save)
+            if save:
+                st.session_state["saved_upload"] = uploaded_file.file_id
+            render_report(streamed_result(streamed), "upload")
+        except Exception as e:
+            st.error(f"⚠️ Error processing JSON file: {str(e)}")
+    elif uploaded_file is not None:
         try:
             # Load JSON
             data = json.load(uploaded_file)
             st.success("✅ JSON file uploaded successfully!")
+            render_report(parsed_result(data), "upload")
+            if save_upload and st.session_state.get("saved_upload") != uploaded_file.file_id:
+                save_snapshot(data)
+                st.session_state["saved_upload"] = uploaded_file.file_id
+        except Exception as e:
+            st.error(f"⚠️ Error processing JSON file: {str(e)}")
 
-            # Display JSON content
-            json_text = json.dumps(data, indent=4)
-            st_ace(value=json_text, language="json", theme="monokai", readonly=True)
+with tab3:
+    st.caption("Uses the Access Token and Instance URL entered on the 🔄 Fetch Report tab.")
+    report_ids = parse_report_ids(st.text_area("📄 Report IDs (one per line or comma-separated)", ""))
+    concurrency = st.slider("⚙️ Max concurrent requests", 1, 16, DEFAULT_CONCURRENCY,
+                            help="Keep this low enough to stay inside your org's concurrent API limits.")
 
-            # Extract Fact Map Data
-            fact_map = data.get("factMap", {})
-            detail_columns = data.get("reportMetadata", {}).get("detailColumns", [])
-            report_format = data.get("reportMetadata", {}).get("reportFormat", "UNKNOWN")
+    if st.button("Fetch All Reports"):
+        if access_token and instance_url and report_ids:
+            render_multi_fetch(access_token, instance_url, report_ids, concurrency)
+        else:
+            st.warning("⚠️ Please enter credentials and at least one Report ID.")
 
-            st.subheader(f"🔹 Report Type: {report_format}")
+with tab4:
+    st.caption("Runs reports as asynchronous report instances (no 2-minute synchronous limit). "
+               "Uses the Access Token and Instance URL entered on the 🔄 Fetch Report tab.")
+    async_ids = parse_report_ids(st.text_area("📄 Report IDs to run asynchronously", "", key="async_ids"))
+    in_flight = st.slider("⚙️ Max instances in flight", 1, 16, DEFAULT_CONCURRENCY, key="async_concurrency",
+                          help="Salesforce also caps concurrent asynchronous runs per org.")
 
-            # Parse Fact Map into DataFrame
-            df = parse_fact_map(fact_map, detail_columns, report_format)
+    running = st.session_state.get("async_job") is not None and not st.session_state["async_job"].done
+    if st.button("Submit Report Instances", disabled=running):
+        if access_token and instance_url and async_ids:
+            st.session_state["async_job"] = AsyncReportJob(access_token, instance_url, async_ids, concurrency=in_flight)
+        else:
+            st.warning("⚠️ Please enter credentials and at least one Report ID.")
+    job = st.session_state.get("async_job")
+    st.session_state["async_polling"] = job is not None and not job.done
+    st.fragment(render_async_job, run_every=ASYNC_REFRESH_SECONDS if st.session_state["async_polling"] else None)()
 
-            if df is not None:
-                st.dataframe(df)  # Render as a table
-            else:
-                st.warning("⚠️ No report data available for rendering.")
-        except Exception as e:
-            st.error(f"⚠️ Error processing JSON file: {str(e)}")
\ No newline at end of file
+with tab5:
+    render_history()
+
+# Sidebar - API governor counters (retries, throttle waits, remaining daily API calls)
+render_governor_sidebar(instance_url)
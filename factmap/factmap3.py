@@ -1,15 +1,18 @@
 import streamlit as st
-import requests
 import json
 import pandas as pd
 from streamlit_ace import st_ace
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.client import api_get
+from sfkit.factmap import column_types, detail_frame
 
 # Function to fetch report data from Salesforce
 def get_report_data(access_token, instance_url, report_id, api_version="60.0"):
     url = f"{instance_url}/services/data/v{api_version}/analytics/reports/{report_id}?includeDetails=true"
-    headers = {"Authorization": f"Bearer {access_token}"}
     
-    response = requests.get(url, headers=headers)
+    response = api_get(access_token, instance_url, url)
     return response.json() if response.status_code == 200 else {"error": response.text}
 
 # Function to extract aggregate values properly
@@ -17,9 +20,9 @@ def extract_aggregates(aggregates):
     return ", ".join([str(agg.get("value", "-")) for agg in aggregates])  # Extract and join values
 
 # Function to parse Summary Report
-def parse_summary_report(fact_map, detail_columns):
-    data_rows = []
+def parse_summary_report(fact_map, detail_columns, types=None):
     summary_rows = []
+    detail_keys = []
 
     for key, section in fact_map.items():
         if "!T" in key:  # Summary Data (Aggregates)
@@ -29,11 +32,10 @@ def parse_summary_report(fact_map, detail_columns):
             }
             summary_rows.append(row_data)
         else:  # Detailed row data
-            for row in section.get("rows", []):
-                row_data = {detail_columns[i]: cell.get("value", "-") for i, cell in enumerate(row["dataCells"])}
-                data_rows.append(row_data)
+            detail_keys.append(key)
 
-    return pd.DataFrame(data_rows) if data_rows else None, pd.DataFrame(summary_rows) if summary_rows else None
+    df_details = detail_frame(fact_map, detail_columns, keys=detail_keys, types=types)  # Typed columnar build
+    return df_details, pd.DataFrame(summary_rows) if summary_rows else None
 
 # Streamlit UI
 st.title("📊 Salesforce Report Viewer")
@@ -70,7 +72,7 @@ with tab1:
 
                 if report_format == "SUMMARY":
                     # Parse Summary Report
-                    df_details, df_summary = parse_summary_report(fact_map, detail_columns)
+                    df_details, df_summary = parse_summary_report(fact_map, detail_columns, column_types(data))
 
                     if df_details is not None:
                         st.subheader("📋 Report Data (Detailed Rows)")
@@ -108,7 +110,7 @@ with tab2:
 
             if report_format == "SUMMARY":
                 # Parse Summary Report
-                df_details, df_summary = parse_summary_report(fact_map, detail_columns)
+                df_details, df_summary = parse_summary_report(fact_map, detail_columns, column_types(data))
 
                 if df_details is not None:
                     st.subheader("📋 Report Data (Detailed Rows)")
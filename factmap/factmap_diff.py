@@ -0,0 +1,99 @@
+import streamlit as st
+import json
+import time
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.factmap import report_frames
+from sfkit.reportdiff import changed_row_count, diff_aggregates, diff_frames, suggest_key_columns
+from sfkit.reportstore import get_report_store
+
+MAX_SHOWN_ROWS = 10000  # the full diff is always available as CSV
+
+report_store = get_report_store()
+
+# Function to parse an uploaded report once per file (reruns reuse the frames)
+def uploaded_frames(uploaded_file, key):
+    if st.session_state.get(f"{key}_file_id") != uploaded_file.file_id:
+        st.session_state[f"{key}_frames"] = report_frames(json.load(uploaded_file))
+        st.session_state[f"{key}_file_id"] = uploaded_file.file_id
+    return st.session_state[f"{key}_frames"]
+
+# Function to pick a snapshot of a stored report
+def pick_snapshot(snapshots, label, default):
+    taken = dict(zip(snapshots["id"], snapshots["taken_at"]))
+    return st.selectbox(label, list(taken), index=default,
+                        format_func=lambda sid: f"#{sid} · {time.strftime('%Y-%m-%d %H:%M', time.localtime(taken[sid]))}")
+
+# Function to show one part of the diff, capped for display, with a CSV download
+def render_part(title, frame, key):
+    st.subheader(f"{title} ({len(frame)})")
+    if frame.empty:
+        st.caption("None.")
+        return
+    st.dataframe(frame.head(MAX_SHOWN_ROWS), hide_index=True)
+    if len(frame) > MAX_SHOWN_ROWS:
+        st.caption(f"Showing the first {MAX_SHOWN_ROWS} rows; download the CSV for all of them.")
+    st.download_button(f"📥 Download {title} (CSV)", frame.to_csv(index=False), f"diff_{key}.csv", "text/csv",
+                       key=f"{key}_csv")
+
+# Streamlit UI
+st.set_page_config(page_title="Salesforce Report Diff", layout="wide")
+st.title("🔀 Salesforce Report Diff")
+st.markdown("Compare two runs of the same report: added, removed and changed rows, and changed aggregates.")
+
+source = st.radio("Compare:", ["Two uploaded JSON files", "Two stored snapshots"], horizontal=True)
+
+old_details = new_details = old_aggregates = new_aggregates = None
+if source == "Two uploaded JSON files":
+    col1, col2 = st.columns(2)
+    old_file = col1.file_uploader("📤 Older run", type="json", key="old_upload")
+    new_file = col2.file_uploader("📤 Newer run", type="json", key="new_upload")
+    if old_file is not None and new_file is not None:
+        try:
+            old_details, old_aggregates = uploaded_frames(old_file, "old")
+            new_details, new_aggregates = uploaded_frames(new_file, "new")
+        except Exception as e:
+            st.error(f"⚠️ Error processing JSON file: {str(e)}")
+else:
+    reports = report_store.reports()
+    reports = reports[reports["snapshots"] > 1]
+    if reports.empty:
+        st.info("No report has two stored snapshots yet; save snapshots from the Report Viewer (factmap2.py).")
+    else:
+        names = dict(zip(reports["report_id"], reports["report_name"].fillna("")))
+        report_id = st.selectbox("📄 Report", list(names), format_func=lambda rid: f"{names[rid]} ({rid})")
+        snapshots = report_store.snapshots(report_id)
+        col1, col2 = st.columns(2)
+        with col1:
+            old_id = pick_snapshot(snapshots, "Older snapshot", len(snapshots) - 2)
+        with col2:
+            new_id = pick_snapshot(snapshots, "Newer snapshot", len(snapshots) - 1)
+        old_details, old_aggregates = report_store.snapshot_frame(old_id), report_store.snapshot_aggregates(old_id)
+        new_details, new_aggregates = report_store.snapshot_frame(new_id), report_store.snapshot_aggregates(new_id)
+
+if old_details is not None and new_details is not None:
+    # Rows are matched on stable identifier columns with one hash join
+    suggested = suggest_key_columns(old_details, new_details)
+    shared = [name for name in old_details.columns if name in new_details.columns]
+    key_columns = st.multiselect("🔑 Key columns (identify the same row in both runs)", shared,
+                                 default=suggested[:1], help="Suggested: " + (", ".join(suggested) or "none unique"))
+    if key_columns:
+        started = time.perf_counter()
+        added, removed, changed = diff_frames(old_details, new_details, key_columns)
+        st.caption(f"Diffed {len(old_details)} → {len(new_details)} rows in {time.perf_counter() - started:.2f}s.")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Added rows", len(added))
+        col2.metric("Removed rows", len(removed))
+        col3.metric("Changed rows", changed_row_count(changed, key_columns))
+        render_part("Added rows", added, "added")
+        render_part("Removed rows", removed, "removed")
+        render_part("Changed cells", changed, "changed")
+    else:
+        st.warning("⚠️ Pick at least one key column.")
+elif old_details is not None or new_details is not None:
+    st.warning("⚠️ Only one of the runs has detail rows; comparing aggregates only.")
+
+aggregate_changes = diff_aggregates(old_aggregates, new_aggregates)
+if aggregate_changes is not None:
+    render_part("Changed aggregates", aggregate_changes, "aggregates")
@@ -1,53 +1,69 @@
 import streamlit as st
 import json
-import pandas as pd
 import matplotlib.pyplot as plt
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.factmap import grouped_table
+from sfkit.rollup import RollupCube
 
 def load_json(file):
     """Load JSON data from the uploaded file."""
     return json.load(file)
 
 def parse_factmap(fact_map):
-    """Extract report details from the factMap."""
+    """Extract report details from the factMap.
+
+    Returns (table, grouped_data): one shared table of every detail row, and
+    per group its aggregates plus the slice of `table` rows it owns.
+    """
+    # Columnar build of every group's rows at once
+    table, offsets = grouped_table(fact_map, [])
     grouped_data = {}
     
     for key, section in fact_map.items():
         group_name = key.replace("!T", "")  # Extract grouping key
         aggregates = [agg.get("value", 0) for agg in section.get("aggregates", [])]
         
-        rows = []
-        for row in section.get("rows", []):
-            row_data = [cell.get("value", "-") for cell in row["dataCells"]]
-            rows.append(row_data)
-        
         grouped_data[group_name] = {
             "aggregates": aggregates,
-            "rows": rows
+            "rows": offsets[key]
         }
     
-    return grouped_data
+    return table, grouped_data
 
-def display_grouped_data(grouped_data):
+def display_grouped_data(table, grouped_data):
     """Render each report group as a table."""
     for group, data in grouped_data.items():
         st.subheader(f"Group: {group}")
         
-        if data["rows"]:
-            df = pd.DataFrame(data["rows"])
-            st.dataframe(df)
+        rows = data["rows"]
+        if rows.stop > rows.start:
+            st.dataframe(table.iloc[rows])  # Slice of the shared table, no per-group copy
         
         st.write("### Aggregates")
         st.write(data["aggregates"])
 
-def plot_chart(grouped_data):
-    """Generate a bar chart from aggregates."""
-    group_labels = list(grouped_data.keys())
-    aggregate_values = [sum(data["aggregates"]) for data in grouped_data.values()]
+def load_cube(uploaded_file, data):
+    """Build the report's rollup cube once per uploaded file; reruns reuse it."""
+    if st.session_state.get("cube_file_id") != uploaded_file.file_id:
+        st.session_state["cube"] = RollupCube.from_report(data)
+        st.session_state["cube_file_id"] = uploaded_file.file_id
+    return st.session_state["cube"]
+
+def plot_chart(cube):
+    """Generate a bar chart of one aggregate at one grouping level (lookups in the rollup cube)."""
+    if not cube.aggregates:
+        return
+    aggregate = st.selectbox("Aggregate", cube.aggregates)
+    max_depth = cube.max_depth()
+    level = st.slider("Grouping level", 1, max_depth, 1) if max_depth > 1 else 1
+    values = cube.level(level, 0, aggregate)["T"].dropna()
     
     fig, ax = plt.subplots()
-    ax.bar(group_labels, aggregate_values, color='skyblue')
+    ax.bar(values.index, values.to_numpy(), color='skyblue')
     ax.set_xlabel("Groups")
-    ax.set_ylabel("Aggregate Values")
+    ax.set_ylabel(aggregate)
     ax.set_title("Summary Report Chart")
     st.pyplot(fig)
 
@@ -61,8 +77,8 @@ if uploaded_file:
     fact_map = data.get("factMap", {})
     
     if fact_map:
-        grouped_data = parse_factmap(fact_map)
-        display_grouped_data(grouped_data)
-        plot_chart(grouped_data)
+        table, grouped_data = parse_factmap(fact_map)
+        display_grouped_data(table, grouped_data)
+        plot_chart(load_cube(uploaded_file, data))
     else:
         st.error("Invalid report format. No factMap found.")
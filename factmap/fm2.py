@@ -1,41 +1,44 @@
 import streamlit as st
 import json
-import pandas as pd
 import matplotlib.pyplot as plt
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.factmap import column_types, grouped_table
 
 def load_json(file):
     """Load JSON data from the uploaded file."""
     return json.load(file)
 
-def parse_factmap(fact_map, column_names):
-    """Extract report details from the factMap."""
+def parse_factmap(fact_map, column_names, types=None):
+    """Extract report details from the factMap.
+
+    Returns (table, grouped_data): one shared table of every detail row, and
+    per group its aggregates plus the slice of `table` rows it owns.
+    """
+    # Columnar build of every group's rows at once
+    table, offsets = grouped_table(fact_map, column_names, types=types)
     grouped_data = {}
     
     for key, section in fact_map.items():
         group_name = key.replace("!T", "")  # Extract grouping key
         aggregates = [agg.get("value", 0) for agg in section.get("aggregates", [])]
         
-        rows = []
-        for row in section.get("rows", []):
-            row_data = [cell.get("value", "-") for cell in row["dataCells"]]
-            rows.append(row_data)
-        
         grouped_data[group_name] = {
             "aggregates": aggregates,
-            "rows": rows,
-            "columns": column_names
+            "rows": offsets[key]
         }
     
-    return grouped_data
+    return table, grouped_data
 
-def display_grouped_data(grouped_data):
+def display_grouped_data(table, grouped_data):
     """Render each report group as a table."""
     for group, data in grouped_data.items():
         st.subheader(f"Group: {group}")
         
-        if data["rows"]:
-            df = pd.DataFrame(data["rows"], columns=data["columns"])
-            st.dataframe(df)
+        rows = data["rows"]
+        if rows.stop > rows.start:
+            st.dataframe(table.iloc[rows])  # Slice of the shared table, no per-group copy
         
         st.write("### Aggregates")
         st.write(data["aggregates"])
@@ -63,8 +66,8 @@ if uploaded_file:
     column_names = data.get("reportMetadata", {}).get("detailColumns", [])
     
     if fact_map:
-        grouped_data = parse_factmap(fact_map, column_names)
-        display_grouped_data(grouped_data)
+        table, grouped_data = parse_factmap(fact_map, column_names, column_types(data))
+        display_grouped_data(table, grouped_data)
         plot_chart(grouped_data)
     else:
         st.error("Invalid report format. No factMap found.")
@@ -1,56 +1,106 @@
 import streamlit as st
 import json
-import pandas as pd
+import math
 import matplotlib.pyplot as plt
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.factmap import column_types, grouped_table
+from sfkit.rollup import RollupCube
+
+FACETS_PER_FIGURE = 48  # small multiples per Matplotlib figure; more groups are paged
+FACET_COLUMNS = 6
 
 def load_json(file):
     """Load JSON data from the uploaded file."""
     return json.load(file)
 
-def parse_factmap(fact_map, column_names, aggregate_names):
-    """Extract report details from the factMap."""
+def parse_factmap(fact_map, column_names, aggregate_names, types=None):
+    """Extract report details from the factMap.
+
+    Returns (table, grouped_data): one shared table of every detail row, and
+    per group its aggregates plus the slice of `table` rows it owns.
+    """
+    # Columnar build of every group's rows at once
+    table, offsets = grouped_table(fact_map, column_names, value_key="label", types=types)
     grouped_data = {}
     
     for key, section in fact_map.items():
         group_name = key.replace("!T", "")  # Extract grouping key
         aggregates = {aggregate_names[i]: agg.get("value", 0) for i, agg in enumerate(section.get("aggregates", []))}
         
-        rows = []
-        for row in section.get("rows", []):
-            row_data = [cell.get("label", "-") for cell in row["dataCells"]]
-            rows.append(row_data)
-        
         grouped_data[group_name] = {
             "aggregates": aggregates,
-            "rows": rows,
-            "columns": column_names
+            "rows": offsets[key]
         }
     
-    return grouped_data
+    return table, grouped_data
 
-def display_grouped_data(grouped_data):
+def display_grouped_data(table, grouped_data):
     """Render each report group as a table."""
     for group, data in grouped_data.items():
         st.subheader(f"Group: {group}")
         
-        if data["rows"]:
-            df = pd.DataFrame(data["rows"], columns=data["columns"])
-            st.dataframe(df)
+        rows = data["rows"]
+        if rows.stop > rows.start:
+            st.dataframe(table.iloc[rows])  # Slice of the shared table, no per-group copy
         
         st.write("### Aggregates")
         st.json(data["aggregates"])
 
-def plot_chart(grouped_data):
-    """Generate a bar chart from aggregates."""
-    for group, data in grouped_data.items():
-        fig, ax = plt.subplots()
-        ax.bar(data["aggregates"].keys(), data["aggregates"].values(), color='skyblue')
-        ax.set_xlabel("Aggregate Metrics")
-        ax.set_ylabel("Values")
-        ax.set_title(f"Summary Report Chart - Group: {group}")
-        ax.set_xticklabels(data["aggregates"].keys(), rotation=30, ha='right')
-        ax.grid(True, linestyle='--', alpha=0.7)
+def chart_frame(data):
+    """One row per group, one numeric column per aggregate (from the report's rollup cube)."""
+    frame = RollupCube.from_report(data).frame(col_depth=0).drop(columns="Column Group")
+    return frame.rename(columns={"Row Group": "Group"})
+
+def plot_vector_chart(aggregates):
+    """All groups in one client-side chart, one facet per aggregate, fed by a single long array."""
+    long = aggregates.melt(id_vars="Group", var_name="Aggregate", value_name="Value").dropna()
+    st.vega_lite_chart(long, {
+        "mark": {"type": "bar", "tooltip": True},
+        "encoding": {
+            "x": {"field": "Group", "type": "nominal", "sort": None},
+            "y": {"field": "Value", "type": "quantitative"},
+            "color": {"field": "Aggregate", "type": "nominal", "legend": None},
+            "row": {"field": "Aggregate", "type": "nominal"},
+        },
+        "resolve": {"scale": {"y": "independent"}},
+    }, use_container_width=True)
+
+def plot_small_multiples(aggregates):
+    """Small multiples of every group's aggregates in one Matplotlib figure per page of groups."""
+    pages = max(1, math.ceil(len(aggregates) / FACETS_PER_FIGURE))
+    page = st.number_input(f"Chart page (of {pages})", 1, pages, 1) if pages > 1 else 1
+    groups = aggregates.iloc[(page - 1) * FACETS_PER_FIGURE:page * FACETS_PER_FIGURE]
+    names = [name for name in aggregates.columns if name != "Group"]
+    if groups.empty or not names:
+        return
+
+    columns = min(FACET_COLUMNS, len(groups))
+    rows = math.ceil(len(groups) / columns)
+    fig, axes = plt.subplots(rows, columns, figsize=(3 * columns, 2.5 * rows), squeeze=False, sharex=True)
+    try:
+        for ax, (_, group) in zip(axes.flat, groups.iterrows()):
+            ax.bar(names, group[names].to_numpy(dtype=float), color='skyblue')
+            ax.set_title(f"Group: {group['Group']}", fontsize=9)
+            ax.tick_params(axis='x', labelrotation=30, labelsize=7)
+            ax.grid(True, linestyle='--', alpha=0.7)
+        for ax in axes.flat[len(groups):]:
+            ax.set_visible(False)
+        fig.suptitle("Summary Report Chart")
+        fig.tight_layout()
         st.pyplot(fig)
+    finally:
+        plt.close(fig)  # figures are not kept across reruns
+
+def plot_chart(data):
+    """Chart every group's aggregates in one payload: a vector chart or one faceted figure."""
+    aggregates = chart_frame(data)
+    mode = st.radio("Chart mode", ["Interactive (one vector chart)", "Small multiples (one image)"], horizontal=True)
+    if mode.startswith("Interactive"):
+        plot_vector_chart(aggregates)
+    else:
+        plot_small_multiples(aggregates)
 
 # Streamlit UI
 st.title("📊 Salesforce Summary Report Viewer")
@@ -64,8 +114,8 @@ if uploaded_file:
     aggregate_names = data.get("reportMetadata", {}).get("aggregates", [])
     
     if fact_map:
-        grouped_data = parse_factmap(fact_map, column_names, aggregate_names)
-        display_grouped_data(grouped_data)
-        plot_chart(grouped_data)
+        table, grouped_data = parse_factmap(fact_map, column_names, aggregate_names, column_types(data))
+        display_grouped_data(table, grouped_data)
+        plot_chart(data)
     else:
         st.error("Invalid report format. No factMap found.")
@@ -1,7 +1,11 @@
 import streamlit as st
 import json
-import jq
+import os
+import tempfile
+import time
 from streamlit_ace import st_ace
+from sfkit.jqcache import compile_query, compiled_queries, parsed_documents
+from sfkit.jqstream import stream_query
 
 # Page Configuration
 st.set_page_config(page_title="JSON Query using JQ", layout="wide")
@@ -17,50 +21,201 @@ sample_selectors = [
 ]
 
 HEIGHT = 300
+STREAM_PREVIEW_LIMIT = 200  # results kept on screen in streaming mode
+STREAM_REFRESH_SECONDS = 0.5
+PAGE_SIZES = [25, 100, 500]
+MAX_OUTPUT_CHARS = 500_000  # cap on the text shipped to the output editor
+PREVIEW_CHARS = 20_000  # uploads are shown as a read-only preview of this many characters
+
+
+# Function to write every result to a file chunk by chunk, never building the full string
+def write_results_file(results, path):
+    encoder = json.JSONEncoder(indent=2)
+    with open(path, "w") as file:
+        file.write("[\n")
+        for i, item in enumerate(results):
+            if i:
+                file.write(",\n")
+            for chunk in encoder.iterencode(item):
+                file.write(chunk)
+        file.write("\n]\n")
+    return path
+
+
+# Function to show one page of results; only that window is serialized and sent to the browser
+def render_result_page(results):
+    total = len(results)
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    page_size = col_size.selectbox("Results per page", PAGE_SIZES)
+    pages = max(1, -(-total // page_size))
+    page = col_page.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+    start = (page - 1) * page_size
+    window = results[start:start + page_size]
+    col_info.caption(f"{total:,} results · showing {start + 1 if window else 0:,}–{start + len(window):,}")
+
+    output_json = json.dumps(window, indent=2)
+    if len(output_json) > MAX_OUTPUT_CHARS:
+        st.warning(f"⚠️ Page output truncated to {MAX_OUTPUT_CHARS:,} of {len(output_json):,} characters; "
+                   "use a smaller page size or download the full result.")
+        output_json = output_json[:MAX_OUTPUT_CHARS] + "\n... (truncated)"
+
+    st_ace(
+        value=output_json,
+        language="json",
+        theme="monokai",
+        height=HEIGHT,
+        readonly=True
+    )
+
+    if st.button("💾 Prepare full result download"):
+        path = st.session_state.get("result_file")
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="jqapp-result-", suffix=".json")
+            os.close(fd)
+            st.session_state["result_file"] = path
+        write_results_file(results, path)
+        with open(path, "rb") as file:
+            st.download_button(
+                label=f"📥 Download full result ({os.path.getsize(path) / 2**20:.1f} MB)",
+                data=file,
+                file_name="jq_result.json",
+                mime="application/json"
+            )
+
+
+# Function to run a query incrementally over a file too large to load
+def render_streaming_mode(uploaded_file):
+    st.subheader("🌊 Streaming Query")
+    st.caption("Values at the stream path are parsed one at a time and the filter runs on each, "
+               "so memory stays bounded by the largest single value.")
+    stream_path = st.text_input("🧭 Stream path (.key, .\"key\" and [] only)", ".factMap[].rows[]")
+    item_query = st.text_input("✏️ JQ filter applied to each value", ".dataCells[0].label")
+
+    if not st.button("▶️ Run Stream"):
+        return
+    if uploaded_file is None:
+        st.warning("⚠️ Upload a JSON file first.")
+        return
+
+    status = st.empty()
+    preview = st.empty()
+    shown = []
+    count = 0
+    started = last_refresh = time.perf_counter()
+    try:
+        uploaded_file.seek(0)
+        for result in stream_query(uploaded_file, stream_path, item_query):
+            count += 1
+            if len(shown) < STREAM_PREVIEW_LIMIT:
+                shown.append(result)
+            now = time.perf_counter()
+            if now - last_refresh >= STREAM_REFRESH_SECONDS:
+                status.info(f"⏳ {count:,} results so far ({now - started:.1f}s)")
+                preview.json(shown, expanded=False)
+                last_refresh = now
+    except Exception as e:
+        status.error(f"Error after {count:,} results: {str(e)}")
+        return
+
+    status.success(f"✅ {count:,} results in {time.perf_counter() - started:.1f}s"
+                   + (f" (showing first {STREAM_PREVIEW_LIMIT:,})" if count > STREAM_PREVIEW_LIMIT else ""))
+    preview.json(shown, expanded=True)
+
 
 # Sidebar - Upload JSON
 st.sidebar.header("📂 Upload JSON File")
 uploaded_file = st.sidebar.file_uploader("Choose a JSON file", type=["json"])
+streaming_mode = st.sidebar.toggle("🌊 Streaming mode (large files)", value=False)
 
-# Load JSON Data
-json_data = {}
-if uploaded_file is not None:
-    json_data = json.load(uploaded_file)
-
-# Left Panel - JSON Editor
-st.subheader("📜 JSON Input")
-json_input = st_ace(
-    value=json.dumps(json_data, indent=2),
-    language="json",
-    theme="monokai",
-    height=HEIGHT
-)
+if streaming_mode:
+    render_streaming_mode(uploaded_file)
+else:
+    # Load JSON Data (parsed once per distinct upload, keyed by content hash)
+    document = None
+    if uploaded_file is not None:
+        document = parsed_documents.get(uploaded_file.getvalue())
+
+    # Left Panel - JSON Input
+    st.subheader("📜 JSON Input")
+    edit_upload = document is not None and st.toggle(
+        "✏️ Edit uploaded JSON",
+        value=False,
+        help="Off: the query runs directly on the uploaded document. "
+             "On: the full document is loaded into the editor and re-parsed after edits."
+    )
+
+    if document is None or edit_upload:
+        if document is not None and document.source_size > PREVIEW_CHARS * 50:
+            st.warning(f"⚠️ Editing a {document.source_size / 2**20:.1f} MB document in the browser can be slow.")
+        json_input = st_ace(
+            value=document.text if document is not None else "{}",
+            language="json",
+            theme="monokai",
+            height=HEIGHT
+        )
+    else:
+        json_input = None  # Query the uploaded object; the editor is only a preview
+        if st.checkbox("👀 Show JSON preview", value=document.source_size <= PREVIEW_CHARS):
+            preview_text, truncated = document.preview(PREVIEW_CHARS)
+            if truncated:
+                st.caption(f"Showing the first {PREVIEW_CHARS:,} characters of a "
+                           f"{document.source_size / 2**20:.1f} MB upload.")
+                preview_text += "\n... (truncated)"
+            st_ace(
+                value=preview_text,
+                language="json",
+                theme="monokai",
+                height=HEIGHT,
+                readonly=True
+            )
+
+    # Dropdown for sample selectors
+    selected_jq = st.selectbox("📌 Choose a Sample Selector", sample_selectors)
 
-# Dropdown for sample selectors
-selected_jq = st.selectbox("📌 Choose a Sample Selector", sample_selectors)
-
-# Manual JQ Input
-jq_query = st.text_input("✏️ Or enter JQ manually", value=selected_jq)
-
-# JQ Query Input
-#jq_query = st.text_input("Enter jq expression:", '.factMap."15!T".aggregates')  # Default jq filter is `.`
-#st.caption("Example: `.skills[]`, `.age`, `{name, age}`")
-
-# Process JSON with jq
-try:
-    json_obj = json.loads(json_input)  # Convert Editor Text to JSON
-    result = jq.compile(jq_query).input(json_obj).all()  # Run JQ Query
-    output_json = json.dumps(result, indent=2)
-except Exception as e:
-    output_json = f"Error: {str(e)}"
-
-# Right Panel - JSON Output
-st.subheader("📤 JQ Output")
-st_ace(
-    value=output_json,
-    language="json",
-    theme="monokai",
-    height=HEIGHT,
-    readonly=True
+    # Manual JQ Input
+    jq_query = st.text_input("✏️ Or enter JQ manually", value=selected_jq)
+
+    # JQ Query Input
+    #jq_query = st.text_input("Enter jq expression:", '.factMap."15!T".aggregates')  # Default jq filter is `.`
+    #st.caption("Example: `.skills[]`, `.age`, `{name, age}`")
+
+    # Process JSON with jq
+    result = None
+    try:
+        if document is not None and (json_input is None or json_input == document.text):
+            json_obj = document.data  # Uploaded (or unedited) document - reuse the parsed object
+        else:
+            json_obj = json.loads(json_input)  # Convert Editor Text to JSON
+        result = compile_query(jq_query).input(json_obj).all()  # Run JQ Query (cached program)
+    except Exception as e:
+        error_text = f"Error: {str(e)}"
+
+    # Right Panel - JSON Output
+    st.subheader("📤 JQ Output")
+    if result is not None:
+        render_result_page(result)
+    else:
+        st_ace(
+            value=error_text,
+            language="json",
+            theme="monokai",
+            height=HEIGHT,
+            readonly=True
+        )
+
+# Sidebar - Compiled query cache stats
+cache_stats = compiled_queries.stats()
+st.sidebar.header("⚡ JQ Program Cache")
+st.sidebar.caption(
+    f"Hits: {cache_stats['hits']} · Misses: {cache_stats['misses']} · "
+    f"Cached: {cache_stats['size']}/{cache_stats['max_size']}"
+)
 
+# Sidebar - Parsed document cache stats
+doc_stats = parsed_documents.stats()
+st.sidebar.header("🗂️ Parsed Document Cache")
+st.sidebar.caption(
+    f"Hits: {doc_stats['hits']} · Misses: {doc_stats['misses']} · "
+    f"Documents: {doc_stats['documents']} · "
+    f"Memory: {doc_stats['used'] / 2**20:.1f} / {doc_stats['budget'] / 2**20:.0f} MB"
 )
\ No newline at end of file
@@ -2,6 +2,11 @@ import streamlit as st
 import json
 import pandas as pd
 from streamlit_ace import st_ace
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.ui import render_parquet_downloads
+from sfkit.factmap import column_types, detail_frame
 
 # Page Configuration           
 st.set_page_config(page_title="Salesforce Report Viewer", layout="wide")
@@ -32,18 +37,12 @@ if uploaded_file:
         # Extract factMap data
         fact_map = data.get("factMap", {})
 
-        # Process Data for Table
-        table_data = []
+        # Process Data for Table (row labels are built column by column)
+        df = detail_frame(fact_map, detail_columns, value_key="label", types=column_types(data))
         aggregate_data = []
         aggregate_headers = set()  # Track aggregate column headers
 
         for key, section in fact_map.items():
-            # Extract row data
-            rows = section.get("rows", [])
-            for row in rows:
-                row_data = [cell.get("label", "-") for cell in row["dataCells"]]
-                table_data.append(row_data)
-
             # Extract aggregate data if available
             aggregates = section.get("aggregates", [])
             if aggregates:
@@ -55,8 +54,7 @@ if uploaded_file:
                 aggregate_data.append(agg_row)
 
         # Display Row-Level Data
-        if table_data:
-            df = pd.DataFrame(table_data, columns=detail_columns)
+        if df is not None:
             st.subheader("📊 Report Data")
             st.dataframe(df)
         else:
@@ -69,4 +67,7 @@ if uploaded_file:
             agg_df = pd.DataFrame(aggregate_data).fillna("N/A")[agg_columns]  # Fill missing values
             st.dataframe(agg_df)
         else:
-            st.info("No aggregate data found.")
\ No newline at end of file
+            st.info("No aggregate data found.")
+
+        # Parquet export of the parsed rows and aggregates (labels, as displayed above)
+        render_parquet_downloads(data, "upload", value_key="label")
\ No newline at end of file
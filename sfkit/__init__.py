@@ -0,0 +1 @@
+"""Shared helpers for the Salesforce report / jq Streamlit apps in this repo."""
@@ -0,0 +1,109 @@
+"""Apache Arrow / Parquet export of parsed reports.
+
+A report becomes two tables, "details" and "aggregates" (see
+sfkit.factmap.report_frames), each carrying the report id, name, format and
+export time in its schema metadata so a Parquet file can be reloaded
+without the original JSON.
+"""
+import io
+import json
+import time
+
+from sfkit.factmap import report_frames
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency - only needed for export
+    pa = pq = None
+
+METADATA_KEY = b"sfkit.report"
+TABLES = ("details", "aggregates")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet/Arrow export needs pyarrow: pip install pyarrow")
+
+
+def report_info(report):
+    attributes = report.get("attributes", {})
+    metadata = report.get("reportMetadata", {})
+    return {
+        "reportId": attributes.get("reportId") or metadata.get("id"),
+        "reportName": attributes.get("reportName") or metadata.get("name"),
+        "reportFormat": metadata.get("reportFormat"),
+        "exportedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def frame_to_arrow(frame, info=None):
+    """Convert a DataFrame to an Arrow table; object columns Arrow cannot type are stored as strings."""
+    _require_pyarrow()
+    frame = frame.copy(deep=False)
+    for name in frame.columns[frame.dtypes == object]:
+        try:
+            pa.array(frame[name], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            frame[name] = frame[name].map(lambda v: v if v is None else (json.dumps(v) if isinstance(v, (dict, list)) else str(v)))
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    if info:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(info).encode()})
+    return table
+
+
+def report_to_arrow(report, value_key="value", tables=TABLES):
+    """Return {"details": Table, "aggregates": Table} for the report (missing parts and tables
+    not in `tables` are omitted)."""
+    info = report_info(report)
+    arrow_tables = {}
+    for name, frame in zip(TABLES, report_frames(report, value_key, tables)):
+        if frame is not None:
+            arrow_tables[name] = frame_to_arrow(frame, {**info, "table": name})
+    return arrow_tables
+
+
+def write_report_parquet(report, path_prefix, value_key="value"):
+    """Write `<path_prefix>.details.parquet` and `<path_prefix>.aggregates.parquet`; return the paths."""
+    paths = []
+    for name, table in report_to_arrow(report, value_key).items():
+        path = f"{path_prefix}.{name}.parquet"
+        pq.write_table(table, path, compression="zstd")
+        paths.append(path)
+    return paths
+
+
+def report_parquet_bytes(report, value_key="value", tables=TABLES):
+    """Return {"details": bytes, "aggregates": bytes} Parquet payloads (of `tables` only)."""
+    payloads = {}
+    for name, table in report_to_arrow(report, value_key, tables).items():
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, compression="zstd")
+        payloads[name] = buffer.getvalue()
+    return payloads
+
+
+def report_parquet_payloads(report, value_key="value"):
+    """{"details": callable, "aggregates": callable}, each building its table's Parquet bytes only
+    when called (st.download_button calls it on click); tables the report has no data for are
+    omitted.  Empty when pyarrow is not installed."""
+    if pa is None:
+        return {}
+    sections = report.get("factMap", {}).values()
+    present = {"details": any(section.get("rows") for section in sections),
+               "aggregates": any(section.get("aggregates") for section in sections)}
+
+    def payload(name):
+        def build():
+            return report_parquet_bytes(report, value_key, tables=(name,))[name]
+        return build
+
+    return {name: payload(name) for name in TABLES if present[name]}
+
+
+def read_report_parquet(source, columns=None):
+    """Read an exported table back as (DataFrame, report info dict)."""
+    _require_pyarrow()
+    table = pq.read_table(source, columns=columns)
+    raw = (table.schema.metadata or {}).get(METADATA_KEY)
+    return table.to_pandas(), json.loads(raw) if raw else {}
@@ -0,0 +1,162 @@
+"""Shared HTTP client for the Salesforce REST / Analytics API helpers.
+
+One connection pool (HTTPAdapter) per instance URL is kept for the life of
+the process, so every helper (and every Streamlit rerun) reuses kept-alive
+connections instead of paying a new TCP + TLS handshake per call.  Each
+caller (instance URL + access token) gets its own requests.Session on top
+of that pool, so cookies set for one user are never sent for another; the
+access token itself is sent per request and never stored on a session.
+user_key() names the user behind a token (org + user ID, looked up once
+per token), for on-disk caches that must outlive token rotation.
+Every request goes through sfkit.governor (per-instance rate limit plus
+retries with backoff on 429 / 503; POSTs on 429 only).
+"""
+import atexit
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sfkit.governor import governed
+
+DEFAULT_API_VERSION = "60.0"
+DEFAULT_TIMEOUT = (10, 300)  # (connect, read) seconds
+POOL_SIZE = 16  # connections kept alive per instance
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_USER_KEYS = 1024  # tokens whose user has been looked up
+MAX_SESSIONS = 256  # per-caller sessions kept; least recently used are closed
+
+_adapters = {}
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+_user_keys = OrderedDict()
+_user_keys_lock = threading.Lock()
+
+
+def api_url(instance_url, api_version, endpoint):
+    """Build a REST URL such as <instance>/services/data/v60.0/analytics/reports."""
+    return f"{instance_url.rstrip('/')}/services/data/v{api_version}/{endpoint.lstrip('/')}"
+
+
+def token_key(access_token):
+    """Short stable digest of an access token, for keying per-caller caches without storing the token."""
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+
+def user_key(access_token, instance_url):
+    """Stable digest of the user behind an access token, from the org and user IDs of the userinfo
+    endpoint; falls back to token_key() when the token cannot read userinfo."""
+    key = (instance_url.rstrip("/").lower(), token_key(access_token))
+    with _user_keys_lock:
+        if key in _user_keys:
+            _user_keys.move_to_end(key)
+            return _user_keys[key]
+
+    # Looked up outside the lock; two sessions racing on a new token both ask once
+    caller = key[1]
+    try:
+        response = api_get(access_token, instance_url, "/services/oauth2/userinfo")
+        if response.status_code == 200:
+            info = response.json()
+            if info.get("user_id") and info.get("organization_id"):
+                caller = hashlib.sha256(f"{info['organization_id']}|{info['user_id']}".encode()).hexdigest()[:16]
+    except (requests.RequestException, ValueError):
+        pass
+
+    with _user_keys_lock:
+        _user_keys[key] = caller
+        while len(_user_keys) > MAX_USER_KEYS:
+            _user_keys.popitem(last=False)
+    return caller
+
+
+def get_session(access_token, instance_url):
+    """Return the caller's session for an instance URL, mounted on the instance's shared connection pool."""
+    instance = instance_url.rstrip("/").lower()
+    key = (instance, token_key(access_token))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is not None:
+            _sessions.move_to_end(key)
+        else:
+            adapter = _adapters.get(instance)
+            if adapter is None:
+                adapter = _adapters[instance] = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            _sessions[key] = session
+            while len(_sessions) > MAX_SESSIONS:
+                _close_session(_sessions.popitem(last=False)[1])
+        return session
+
+
+def _close_session(session):
+    # Unmount first: Session.close() would also close the instance's shared adapter
+    session.adapters.clear()
+    session.close()
+
+
+def auth_headers(access_token, extra=None):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    if extra:
+        headers.update(extra)
+    return headers
+
+
+def api_get(access_token, instance_url, url, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """GET `url` (absolute, or a path on the instance) through the pooled session."""
+    if url.startswith("/"):
+        url = instance_url.rstrip("/") + url
+    # The session is looked up per attempt, so a retry after backoff never uses an evicted one
+    return governed(instance_url, lambda: get_session(access_token, instance_url).get(
+        url, headers=auth_headers(access_token, headers), timeout=timeout, **kwargs))
+
+
+def api_post(access_token, instance_url, url, json=None, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """POST to `url` (absolute, or a path on the instance) through the pooled session."""
+    if url.startswith("/"):
+        url = instance_url.rstrip("/") + url
+    return governed(instance_url, lambda: get_session(access_token, instance_url).post(
+        url, json=json, headers=auth_headers(access_token, headers), timeout=timeout, **kwargs), method="POST")
+
+
+def stream_to_file(response, path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """Write a streamed response body to `path` chunk by chunk; returns (bytes written, seconds).
+
+    The body goes to a temp file in the same directory that is renamed over
+    `path` only once complete, so readers never see a partial download.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".partial-")
+    written = 0
+    started = time.perf_counter()
+    try:
+        with os.fdopen(fd, "wb") as file:
+            for chunk in response.iter_content(chunk_size):
+                file.write(chunk)
+                written += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    finally:
+        response.close()
+    return written, time.perf_counter() - started
+
+
+@atexit.register
+def close_sessions():
+    """Close every pooled connection (the sessions share their instance's adapter)."""
+    with _sessions_lock:
+        for adapter in _adapters.values():
+            adapter.close()
+        _adapters.clear()
+        _sessions.clear()
@@ -0,0 +1,146 @@
+"""Full dashboard snapshot: results, describe and PNG fetched concurrently.
+
+The PNG render is the slowest call and only changes when the dashboard is
+refreshed, so it is cached on disk keyed by the caller's user + dashboard
+ID + the latest component refreshDate from the results (dashboards that
+run as the viewing user show that user's data).  Only the newest render
+per user and dashboard is kept, and renders unused for a month are swept.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from sfkit.client import DEFAULT_API_VERSION, api_get, api_url, user_key
+from sfkit.httpcache import DEFAULT_CACHE_DIR, cached_get, sweep_now_and_then, touch
+
+DEFAULT_PNG_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "png")
+DESCRIBE_TTL = 3600  # seconds a cached dashboard describe is served without revalidation
+
+DashboardSnapshot = namedtuple("DashboardSnapshot", ["results", "metadata", "png", "png_cached", "errors", "seconds"])
+
+png_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        png_stats[name] += 1
+
+
+def last_refresh(results):
+    """Latest refreshDate over the dashboard's components, or None if none has been refreshed."""
+    dates = [(component.get("status") or {}).get("refreshDate")
+             for component in results.get("componentData", [])]
+    dates = [date for date in dates if date]
+    return max(dates) if dates else None
+
+
+def _png_prefix(caller, instance_url, dashboard_id, png_dir):
+    key = hashlib.sha256(f"{instance_url.rstrip('/').lower()}|{caller}|{dashboard_id}".encode()).hexdigest()[:16]
+    return os.path.join(png_dir, key)
+
+
+def _png_path(caller, instance_url, dashboard_id, refreshed, png_dir):
+    stamp = hashlib.sha256(refreshed.encode()).hexdigest()[:12]
+    return f"{_png_prefix(caller, instance_url, dashboard_id, png_dir)}-{stamp}.png"
+
+
+def cached_png(caller, instance_url, dashboard_id, refreshed, png_dir=DEFAULT_PNG_DIR):
+    """PNG bytes `caller` (a client.user_key) downloaded at the given refresh, or None."""
+    path = _png_path(caller, instance_url, dashboard_id, refreshed, png_dir)
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    touch(path)
+    return data
+
+
+def store_png(caller, instance_url, dashboard_id, refreshed, data, png_dir=DEFAULT_PNG_DIR):
+    """Save `caller`'s render and drop their older renders of the same dashboard."""
+    path = _png_path(caller, instance_url, dashboard_id, refreshed, png_dir)
+    os.makedirs(png_dir, exist_ok=True)
+    sweep_now_and_then(png_dir)
+    fd, tmp_path = tempfile.mkstemp(dir=png_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    prefix = os.path.basename(_png_prefix(caller, instance_url, dashboard_id, png_dir)) + "-"
+    for name in os.listdir(png_dir):
+        if name.startswith(prefix) and name.endswith(".png") and os.path.join(png_dir, name) != path:
+            try:
+                os.remove(os.path.join(png_dir, name))
+            except OSError:
+                pass
+
+
+def get_results(access_token, instance_url, dashboard_id, api_version=DEFAULT_API_VERSION):
+    response = api_get(access_token, instance_url, api_url(instance_url, api_version, f"analytics/dashboards/{dashboard_id}"))
+    return response.json() if response.status_code == 200 else {"error": response.text}
+
+
+def get_metadata(access_token, instance_url, dashboard_id, api_version=DEFAULT_API_VERSION, force_refresh=False):
+    url = api_url(instance_url, api_version, f"analytics/dashboards/{dashboard_id}/describe")
+    response = cached_get(access_token, instance_url, url, ttl=DESCRIBE_TTL, force_refresh=force_refresh)
+    return response.json() if response.status_code == 200 else {"error": response.text}
+
+
+def download_png(access_token, instance_url, dashboard_id):
+    url = f"{instance_url.rstrip('/')}/analytics/download/lightning-dashboard/{dashboard_id}.png"
+    response = api_get(access_token, instance_url, url, stream=True)
+    if response.status_code == 200:
+        return response.content
+    return {"error": f"Error: {response.status_code} - {response.text}"}
+
+
+def fetch_snapshot(access_token, instance_url, dashboard_id, api_version=DEFAULT_API_VERSION,
+                   force_refresh=False, png_dir=DEFAULT_PNG_DIR):
+    """Fetch results, describe and PNG for one dashboard with the three calls overlapping.
+
+    Results and describe start together; the PNG step waits only for the
+    results (it needs their refreshDate for the cache key) and then either
+    reads the cached render or downloads it while describe is still in flight.
+    """
+    started = time.perf_counter()
+    errors = {}
+
+    def png_step(results_future):
+        results = results_future.result()
+        refreshed = None if "error" in results else last_refresh(results)
+        caller = user_key(access_token, instance_url) if refreshed and png_dir else None
+        if caller and not force_refresh:
+            data = cached_png(caller, instance_url, dashboard_id, refreshed, png_dir)
+            if data is not None:
+                _count("hits")
+                return data, True
+        _count("misses")
+        data = download_png(access_token, instance_url, dashboard_id)
+        if caller and isinstance(data, bytes):
+            store_png(caller, instance_url, dashboard_id, refreshed, data, png_dir)
+        return data, False
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results_future = pool.submit(get_results, access_token, instance_url, dashboard_id, api_version)
+        metadata_future = pool.submit(get_metadata, access_token, instance_url, dashboard_id, api_version, force_refresh)
+        png_future = pool.submit(png_step, results_future)
+
+        outcome = {}
+        for name, future in (("results", results_future), ("metadata", metadata_future), ("png", png_future)):
+            try:
+                outcome[name] = future.result()
+            except Exception as e:
+                outcome[name] = {"error": f"Exception: {str(e)}"}
+            if isinstance(outcome[name], dict) and "error" in outcome[name]:
+                errors[name] = outcome[name]["error"]
+
+    png, png_cached = outcome["png"] if isinstance(outcome["png"], tuple) else (outcome["png"], False)
+    if isinstance(png, dict):
+        errors["png"] = png["error"]
+        png = None
+    return DashboardSnapshot(outcome["results"], outcome["metadata"], png, png_cached, errors,
+                             time.perf_counter() - started)
@@ -0,0 +1,166 @@
+"""Content-addressed store for downloaded report exports.
+
+Files are kept once per distinct payload under blobs/<sha256><ext>, and a
+small index.json maps each report ID to its versions (newest last).  A
+download identical to the report's latest version is not written again.
+Old versions are evicted by per-report count and by total store size;
+blobs no longer referenced by any version are deleted once they are older
+than a grace period.  Index updates hold an exclusive lock on the store's
+.lock file, so several app processes can share one store directory.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_MAX_VERSIONS = 5  # per report
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # whole store
+HASH_CHUNK_SIZE = 1024 * 1024
+ORPHAN_GRACE_SECONDS = 3600  # unreferenced blobs younger than this may belong to another process's add()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_contents(path):
+    """A callable returning the file's bytes, for st.download_button to read on click rather than on every rerun."""
+    def read():
+        with open(path, "rb") as file:
+            return file.read()
+    return read
+
+
+class ExportStore:
+    def __init__(self, root, max_versions=DEFAULT_MAX_VERSIONS, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_versions = max_versions
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self.lock_path = os.path.join(root, ".lock")
+        self._lock = threading.Lock()  # flock is per open file, so threads of one process also serialize here
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access to the index across threads and processes."""
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def temp_path(self, suffix=""):
+        """A fresh (not yet created) path inside the store, on the same filesystem so add() can rename it."""
+        os.makedirs(self.root, exist_ok=True)
+        return os.path.join(self.root, f".incoming-{uuid.uuid4().hex}{suffix}")
+
+    def blob_path(self, sha256, ext=""):
+        return os.path.join(self.root, "blobs", sha256[:2], sha256 + ext)
+
+    def add(self, report_id, incoming_path, filename):
+        """Move a finished download into the store.
+
+        Returns (blob path, duplicate): duplicate is True when the payload
+        matched the report's latest version and nothing new was recorded.
+        """
+        sha256 = file_sha256(incoming_path)
+        ext = os.path.splitext(filename)[1]
+        path = self.blob_path(sha256, ext)
+        with self._locked():
+            index = self._load_index()
+            versions = index.setdefault(report_id, [])
+            if os.path.exists(path):
+                os.remove(incoming_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(incoming_path, path)
+
+            duplicate = bool(versions) and versions[-1]["sha256"] == sha256
+            if duplicate:
+                versions[-1]["last_seen"] = time.time()
+            else:
+                versions.append({
+                    "sha256": sha256,
+                    "ext": ext,
+                    "filename": filename,
+                    "size": os.path.getsize(path),
+                    "stored_at": time.time(),
+                    "last_seen": time.time(),
+                })
+            self._evict(index)
+            self._save_index(index)
+        return path, duplicate
+
+    def versions(self, report_id):
+        with self._lock:
+            return list(self._load_index().get(report_id, []))
+
+    def total_bytes(self, index=None):
+        index = self._load_index() if index is None else index
+        blobs = {(v["sha256"], v["ext"]): v["size"] for versions in index.values() for v in versions}
+        return sum(blobs.values())
+
+    def _evict(self, index):
+        for versions in index.values():
+            del versions[:-self.max_versions]
+        # Drop the globally oldest versions until the store fits, keeping each report's latest
+        while self.total_bytes(index) > self.max_bytes:
+            candidates = [(v["stored_at"], report_id) for report_id, versions in index.items() for v in versions[:-1]]
+            if not candidates:
+                break
+            _, report_id = min(candidates)
+            index[report_id].pop(0)
+        for report_id in [report_id for report_id, versions in index.items() if not versions]:
+            del index[report_id]
+        self._remove_orphans(index)
+
+    def _remove_orphans(self, index):
+        live = {v["sha256"] + v["ext"] for versions in index.values() for v in versions}
+        cutoff = time.time() - ORPHAN_GRACE_SECONDS
+        blobs_dir = os.path.join(self.root, "blobs")
+        for directory, _, files in os.walk(blobs_dir):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    if name not in live and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:  # removed by another process meanwhile
+                    pass
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".index-", suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump(index, file, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(root, **limits):
+    """Return the process-wide ExportStore for `root` (sessions share it; processes share its lock file)."""
+    key = os.path.abspath(root)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ExportStore(root, **limits)
+        return _stores[key]
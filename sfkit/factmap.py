@@ -0,0 +1,265 @@
+"""Columnar conversion of Salesforce report factMaps into pandas DataFrames.
+
+factMap keys are "<row grouping>!<column grouping>" ("T" for totals), e.g.
+"T!T" for the grand total, "0!T" for the first summary group and "0_1!2"
+for a matrix cell.  Cell values are pulled out in one flat pass into a 2-D
+object array that pandas slices into columns, so no per-row dict is built.
+
+When the report's reportExtendedMetadata column data types are supplied,
+numeric columns become float/int arrays, dates become datetime64 and
+low-cardinality picklists become categoricals instead of object columns.
+"""
+import numpy as np
+import pandas as pd
+
+TOTAL = "T"
+GRAND_TOTAL_KEY = "T!T"
+
+NUMERIC_TYPES = {"currency", "double", "int", "percent"}
+DATE_TYPES = {"date", "datetime"}
+CATEGORY_TYPES = {"picklist", "multipicklist", "combobox"}
+CATEGORY_MAX_RATIO = 0.5  # picklists with more distinct values than this share of rows stay as-is
+
+
+def split_key(key):
+    """Split a factMap key into (row grouping, column grouping)."""
+    row_group, _, col_group = key.partition("!")
+    return row_group, col_group or TOTAL
+
+
+def cell_matrix(rows, n_columns, value_key="value", missing="-"):
+    """Return a (len(rows), n_columns) object array of cell values."""
+    cells = [row["dataCells"] for row in rows]
+    if all(len(row) == n_columns for row in cells):
+        flat = [cell.get(value_key, missing) for row in cells for cell in row]
+    else:  # ragged rows - pad short ones, drop cells beyond the known columns
+        pad = [{}] * n_columns
+        flat = [cell.get(value_key, missing) for row in cells for cell in (row + pad)[:n_columns]]
+    matrix = np.empty(len(flat), dtype=object)
+    matrix[:] = flat
+    return matrix.reshape(len(cells), n_columns)
+
+
+def column_types(report, section="detailColumnInfo"):
+    """Map column names to Salesforce data types from reportExtendedMetadata.
+
+    Use section="aggregateColumnInfo" for the aggregate columns.
+    """
+    info = report.get("reportExtendedMetadata", {}).get(section, {})
+    return {name: column.get("dataType") for name, column in info.items()}
+
+
+def _typed_column(values, data_type, value_key):
+    """Convert one object column to the dtype implied by its Salesforce data type, or None."""
+    if data_type in CATEGORY_TYPES:
+        if values.nunique(dropna=False) <= max(1, len(values) * CATEGORY_MAX_RATIO):
+            return values.astype("category")
+        return None
+    if value_key != "value":  # labels are display strings ("$1,200.00", "1/2/2025")
+        return None
+    if data_type in NUMERIC_TYPES:
+        if data_type == "currency":
+            values = values.map(lambda v: v.get("amount") if isinstance(v, dict) else v)
+        numbers = pd.to_numeric(values, errors="coerce")
+        if data_type == "int" and numbers.notna().all():
+            return numbers.astype("int64")
+        return numbers.astype("float64")
+    if data_type in DATE_TYPES:
+        if data_type == "date":
+            return pd.to_datetime(values, errors="coerce", format="%Y-%m-%d")
+        return pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+    if data_type == "boolean":
+        # Missing / short-row cells carry the "-" sentinel; like errors="coerce", they become NA
+        return values.map(lambda v: v if isinstance(v, bool) else pd.NA).astype("boolean")
+    return None
+
+
+def _materialize(matrix, names, types, value_key):
+    frame = pd.DataFrame(matrix, columns=names)
+    typed = {}
+    for name, data_type in (types or {}).items():
+        if name in frame.columns and data_type:
+            column = _typed_column(frame[name], data_type, value_key)
+            if column is not None:
+                typed[name] = column
+    rest = [name for name in names if name not in typed]
+    if rest:
+        frame[rest] = frame[rest].infer_objects()
+    for name, column in typed.items():
+        frame[name] = column
+    return frame
+
+
+def _column_names(detail_columns, rows):
+    if detail_columns:
+        return list(detail_columns)
+    width = max((len(row["dataCells"]) for row in rows), default=0)
+    return [f"Column {i + 1}" for i in range(width)]
+
+
+def _sections(fact_map, keys, field):
+    keys = fact_map.keys() if keys is None else [key for key in keys if key in fact_map]
+    return [(key, fact_map[key][field]) for key in keys if fact_map[key].get(field)]
+
+
+def _grouping_columns(keys, counts, report_format):
+    """Grouping label columns for sections `keys`, each repeated counts[i] times."""
+    if report_format == "SUMMARY":
+        groups = {"Grouping": [split_key(key)[0] for key in keys]}
+    elif report_format == "MATRIX":
+        split = [split_key(key) for key in keys]
+        groups = {"Row Group": [row for row, _ in split], "Column Group": [col for _, col in split]}
+    else:
+        return {}
+    return {name: np.repeat(np.array(labels, dtype=object), counts) for name, labels in groups.items()}
+
+
+def detail_frame(fact_map, detail_columns, report_format="TABULAR", value_key="value", missing="-", keys=None,
+                 types=None):
+    """Build the detail-row DataFrame of a report, or None when it has no rows.
+
+    SUMMARY reports get a "Grouping" column and MATRIX reports get "Row Group"
+    and "Column Group" columns naming the factMap section of every row.
+    `keys` restricts the conversion to those factMap sections and `types`
+    (see column_types) materializes typed columns.
+    """
+    sections = _sections(fact_map, keys, "rows")
+    if not sections:
+        return None
+    rows = [row for _, section_rows in sections for row in section_rows]
+    names = _column_names(detail_columns, rows)
+    return cells_frame(cell_matrix(rows, len(names), value_key, missing), names,
+                       [key for key, _ in sections], [len(r) for _, r in sections], report_format, types, value_key)
+
+
+def cells_frame(matrix, names, keys, counts, report_format="TABULAR", types=None, value_key="value"):
+    """Detail DataFrame from a cell matrix whose rows belong, in order, to factMap sections
+    `keys` (counts[i] rows each), with the grouping columns of the report format."""
+    frame = _materialize(matrix, names, types, value_key)
+    groups = _grouping_columns(keys, counts, report_format)
+    for position, (name, labels) in enumerate(groups.items()):
+        frame.insert(position, name, labels)
+    return frame
+
+
+def grouped_table(fact_map, detail_columns, value_key="value", missing="-", types=None):
+    """Build one shared detail table for all sections plus a section -> row slice index.
+
+    Returns (frame, offsets): `frame` holds every section's rows back to back
+    (None when there are none) and offsets[key] is the slice of `frame` rows
+    belonging to that factMap key, so frame.iloc[offsets[key]] is a per-group
+    view built without copying cells into per-group containers.
+    """
+    offsets = {}
+    start = 0
+    for key, section in fact_map.items():
+        stop = start + len(section.get("rows", []))
+        offsets[key] = slice(start, stop)
+        start = stop
+    frame = detail_frame(fact_map, detail_columns, value_key=value_key, missing=missing, types=types)
+    return frame, offsets
+
+
+def aggregate_frame(fact_map, report_format="SUMMARY", aggregate_names=None, value_key="value", keys=None,
+                    types=None):
+    """Build one row per factMap section holding its aggregates, or None when there are none."""
+    sections = _sections(fact_map, keys, "aggregates")
+    if not sections:
+        return None
+    width = max(len(aggregates) for _, aggregates in sections)
+    names = list(aggregate_names or [])[:width]
+    names += [f"Aggregate {i + 1}" for i in range(len(names), width)]
+
+    rows = [{"dataCells": aggregates} for _, aggregates in sections]
+    frame = _materialize(cell_matrix(rows, width, value_key, None), names, types, value_key)
+    groups = _grouping_columns([key for key, _ in sections], 1, "MATRIX" if report_format == "MATRIX" else "SUMMARY")
+    for position, (name, labels) in enumerate(groups.items()):
+        frame.insert(position, name, labels)
+    return frame
+
+
+def grouping_labels(report, axis="groupingsDown"):
+    """Map grouping keys ("0", "0_1", ...) to their labels for one axis of the report."""
+    labels = {TOTAL: "Total"}
+    pending = list(report.get(axis, {}).get("groupings", []))
+    while pending:
+        grouping = pending.pop()
+        labels[grouping["key"]] = grouping.get("label", grouping["key"])
+        pending.extend(grouping.get("groupings", []))
+    return labels
+
+
+class MatrixIndex:
+    """Two-level row group -> column group -> section index over a MATRIX factMap.
+
+    Built once per report; any cell, row total ("R!T"), column total ("T!C")
+    or the grand total ("T!T") is then a pair of dict lookups.
+    """
+
+    def __init__(self, fact_map):
+        self.by_row = {}
+        self.by_column = {}
+        for key, section in fact_map.items():
+            row_group, col_group = split_key(key)
+            self.by_row.setdefault(row_group, {})[col_group] = section
+            self.by_column.setdefault(col_group, {})[row_group] = section
+        self.row_groups = [group for group in self.by_row if group != TOTAL]
+        self.column_groups = [group for group in self.by_column if group != TOTAL]
+
+    def cell(self, row_group, col_group):
+        return self.by_row.get(row_group, {}).get(col_group)
+
+    def row(self, row_group):
+        """All sections of a row group, keyed by column group (including "T")."""
+        return self.by_row.get(row_group, {})
+
+    def column(self, col_group):
+        """All sections of a column group, keyed by row group (including "T")."""
+        return self.by_column.get(col_group, {})
+
+    def row_total(self, row_group):
+        return self.cell(row_group, TOTAL)
+
+    def column_total(self, col_group):
+        return self.cell(TOTAL, col_group)
+
+    def grand_total(self):
+        return self.cell(TOTAL, TOTAL)
+
+    def pivot(self, aggregate=0, value_key="value", row_labels=None, column_labels=None):
+        """Rows x columns DataFrame of one aggregate, with the "T" totals row and column last."""
+        rows = self.row_groups + ([TOTAL] if TOTAL in self.by_row else [])
+        cols = self.column_groups + ([TOTAL] if TOTAL in self.by_column else [])
+        data = {}
+        for col_group in cols:
+            column = self.by_column.get(col_group, {})
+            data[col_group] = [_aggregate_value(column.get(row_group), aggregate, value_key) for row_group in rows]
+        frame = pd.DataFrame(data, index=rows)
+        if row_labels:
+            frame.index = [row_labels.get(group, group) for group in rows]
+        if column_labels:
+            frame.columns = [column_labels.get(group, group) for group in cols]
+        return frame
+
+
+def _aggregate_value(section, aggregate, value_key):
+    if not section:
+        return None
+    aggregates = section.get("aggregates", [])
+    return aggregates[aggregate].get(value_key) if aggregate < len(aggregates) else None
+
+
+def report_frames(report, value_key="value", tables=("details", "aggregates")):
+    """Typed (details, aggregates) frames for a whole report response; either may be None, and
+    is when left out of `tables`."""
+    metadata = report.get("reportMetadata", {})
+    fact_map = report.get("factMap", {})
+    report_format = metadata.get("reportFormat", "TABULAR")
+    details = aggregates = None
+    if "details" in tables:
+        details = detail_frame(fact_map, metadata.get("detailColumns", []), report_format, value_key,
+                               types=column_types(report))
+    if "aggregates" in tables:
+        aggregates = aggregate_frame(fact_map, report_format, metadata.get("aggregates"), value_key,
+                                     types=column_types(report, "aggregateColumnInfo"))
+    return details, aggregates
@@ -0,0 +1,184 @@
+"""Incremental factMap parsing for report JSON that is too big to load at once.
+
+The report is read with ijson straight from a file or an HTTP body and
+turned into a sequence of events:
+
+    ("meta", name, value)      a top-level key other than factMap
+                               (reportMetadata, groupingsDown, ...)
+    ("rows", key, batch)       up to `batch_size` detail rows of factMap
+                               section `key`, each a list of cell values
+    ("section", key, section)  the rest of section `key` (aggregates, ...)
+                               once all its rows have been streamed
+
+Only the row being decoded and the current batch are held by the parser.
+StreamedReport collects the events into compact cell-value lists (no
+per-cell dicts), keeping at most `keep_rows` detail rows for display, and
+builds the same frames as sfkit.factmap at the end.  Consumers that need
+every row handle the "rows" batches as they arrive instead, e.g.
+sfkit.reportstore.SnapshotWriter, so peak memory stays at one batch plus
+the kept rows.
+"""
+from contextlib import contextmanager
+
+import ijson
+import numpy as np
+from ijson.common import ObjectBuilder
+
+from sfkit.client import DEFAULT_API_VERSION, api_get, api_url
+from sfkit.factmap import cells_frame, column_types
+
+ROW_BATCH = 5000
+
+_CONTAINER_START = ("start_map", "start_array")
+_CONTAINER_END = ("end_map", "end_array")
+
+
+def _build(events, event, value):
+    """Consume one complete JSON value whose first event is (event, value) and return it."""
+    if event not in _CONTAINER_START:
+        return value
+    builder = ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in _CONTAINER_START:
+            depth += 1
+        elif event in _CONTAINER_END:
+            depth -= 1
+            if depth == 0:
+                return builder.value
+
+
+def _fact_map_events(events, batch_size, value_key, missing):
+    for _, event, key in events:
+        if event == "end_map":
+            return
+        _, event, value = next(events)
+        if event != "start_map":
+            _build(events, event, value)
+            continue
+        section = {}
+        for _, event, field in events:
+            if event == "end_map":
+                break
+            _, event, value = next(events)
+            if field != "rows" or event != "start_array":
+                section[field] = _build(events, event, value)
+                continue
+            batch = []
+            for _, event, value in events:
+                if event == "end_array":
+                    break
+                row = _build(events, event, value)
+                batch.append([cell.get(value_key, missing) for cell in row.get("dataCells", [])])
+                if len(batch) >= batch_size:
+                    yield "rows", key, batch
+                    batch = []
+            if batch:
+                yield "rows", key, batch
+        yield "section", key, section
+
+
+def iter_report(fileobj, batch_size=ROW_BATCH, value_key="value", missing="-"):
+    """Yield ("meta" | "rows" | "section", name, payload) events from a report JSON stream."""
+    events = iter(ijson.parse(fileobj, use_float=True))
+    _, event, _ = next(events)
+    if event != "start_map":
+        raise ValueError("A report response must be a JSON object")
+    for _, event, name in events:
+        if event == "end_map":
+            return
+        _, event, value = next(events)
+        if name == "factMap" and event == "start_map":
+            yield from _fact_map_events(events, batch_size, value_key, missing)
+        else:
+            yield "meta", name, _build(events, event, value)
+
+
+@contextmanager
+def open_report_stream(access_token, instance_url, report_id, api_version=DEFAULT_API_VERSION):
+    """Start a synchronous report run and yield its body as a file-like object; the response is
+    closed on exit, also when parsing fails half-way."""
+    url = api_url(instance_url, api_version, f"analytics/reports/{report_id}?includeDetails=true")
+    response = api_get(access_token, instance_url, url, stream=True)
+    try:
+        if response.status_code != 200:
+            raise ValueError(f"Error: {response.status_code} - {response.text}")
+        response.raw.decode_content = True  # undo gzip while reading
+        yield response.raw
+    finally:
+        response.close()
+
+
+class StreamedReport:
+    """Accumulates iter_report events.
+
+    `report` ends up shaped like the full response minus the detail rows, so
+    column_types, MatrixIndex, grouping_labels and aggregate_frame work on it
+    unchanged; the first `keep_rows` rows (all when None) are kept as plain
+    cell-value lists per section, for frame() and iter_rows().  `row_count`
+    counts every streamed row.
+    """
+
+    def __init__(self, keep_rows=None):
+        self.report = {"factMap": {}}
+        self.row_count = 0
+        self.keep_rows = keep_rows
+        self._rows = []
+        self._keys = []
+        self._counts = []
+
+    def add(self, kind, name, payload):
+        if kind == "meta":
+            self.report[name] = payload
+        elif kind == "section":
+            self.report["factMap"][name] = payload
+        else:
+            self.row_count += len(payload)
+            if self.keep_rows is not None:
+                payload = payload[:max(0, self.keep_rows - len(self._rows))]
+            if not payload:
+                return
+            self._rows.extend(payload)
+            if self._keys and self._keys[-1] == name:
+                self._counts[-1] += len(payload)
+            else:
+                self._keys.append(name)
+                self._counts.append(len(payload))
+
+    @property
+    def kept_rows(self):
+        return len(self._rows)
+
+    def iter_rows(self):
+        """(factMap key, [cell values]) for every kept detail row, in order."""
+        position = 0
+        for key, count in zip(self._keys, self._counts):
+            for row in self._rows[position:position + count]:
+                yield key, row
+            position += count
+
+    @property
+    def metadata(self):
+        return self.report.get("reportMetadata", {})
+
+    def frame(self, missing="-"):
+        """The typed detail DataFrame of the kept rows (as sfkit.factmap.detail_frame builds it),
+        or None without rows."""
+        if not self._rows:
+            return None
+        names = list(self.metadata.get("detailColumns", []))
+        if not names:
+            names = [f"Column {i + 1}" for i in range(max(len(row) for row in self._rows))]
+        width = len(names)
+        if all(len(row) == width for row in self._rows):
+            flat = [value for row in self._rows for value in row]
+        else:  # ragged rows - pad short ones, drop cells beyond the known columns
+            pad = [missing] * width
+            flat = [value for row in self._rows for value in (row + pad)[:width]]
+        matrix = np.empty(len(flat), dtype=object)
+        matrix[:] = flat
+        matrix = matrix.reshape(len(self._rows), width)
+        return cells_frame(matrix, names, self._keys, self._counts,
+                           self.metadata.get("reportFormat", "TABULAR"), column_types(self.report))
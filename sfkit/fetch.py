@@ -0,0 +1,97 @@
+"""Concurrent fetching of many reports with a bounded number of requests in flight."""
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sfkit.client import DEFAULT_API_VERSION, POOL_SIZE, api_get, api_url
+from sfkit.factmap import column_types
+from sfkit.rollup import RollupCube, parse_fact_map
+
+DEFAULT_CONCURRENCY = 4
+
+FetchResult = namedtuple("FetchResult", ["report_id", "data", "error", "seconds"])
+ParsedReport = namedtuple("ParsedReport", ["report_id", "name", "frame", "error", "seconds"])
+
+
+def parse_report_ids(text):
+    """Split pasted report IDs on commas / whitespace, dropping duplicates but keeping order."""
+    return list(dict.fromkeys(part for part in re.split(r"[\s,;]+", text) if part))
+
+
+def fetch_report(access_token, instance_url, report_id, api_version=DEFAULT_API_VERSION):
+    """Run one report synchronously with details and return a FetchResult."""
+    started = time.perf_counter()
+    url = api_url(instance_url, api_version, f"analytics/reports/{report_id}?includeDetails=true")
+    try:
+        response = api_get(access_token, instance_url, url)
+        if response.status_code == 200:
+            return FetchResult(report_id, response.json(), None, time.perf_counter() - started)
+        error = f"Error: {response.status_code} - {response.text}"
+    except Exception as e:
+        error = f"Exception: {str(e)}"
+    return FetchResult(report_id, None, error, time.perf_counter() - started)
+
+
+def fetch_reports(access_token, instance_url, report_ids, api_version=DEFAULT_API_VERSION,
+                  concurrency=DEFAULT_CONCURRENCY, fetch=fetch_report):
+    """Yield a FetchResult per report as each finishes, with at most `concurrency` in flight.
+
+    Concurrency is capped at the shared session's connection pool size so
+    every worker gets a kept-alive connection.
+    """
+    workers = max(1, min(concurrency, POOL_SIZE, len(report_ids) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fetch, access_token, instance_url, report_id, api_version) for report_id in report_ids]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def latency_summary(results, wall_seconds):
+    """Summarize a batch of FetchResults: counts, latency percentiles and throughput."""
+    latencies = sorted(result.seconds for result in results)
+    count = len(latencies)
+
+    def percentile(p):
+        return latencies[min(count - 1, int(p * count))] if count else 0.0
+
+    return {
+        "reports": count,
+        "succeeded": sum(result.error is None for result in results),
+        "failed": sum(result.error is not None for result in results),
+        "wall_seconds": round(wall_seconds, 3),
+        "p50_seconds": round(percentile(0.50), 3),
+        "p95_seconds": round(percentile(0.95), 3),
+        "max_seconds": round(latencies[-1], 3) if count else 0.0,
+        "reports_per_second": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+
+
+def parse_result(result):
+    """Turn a FetchResult into a ParsedReport: the report's table (see sfkit.rollup.parse_fact_map)
+    and name, without the raw response, which can then be freed."""
+    if result.error is not None:
+        return ParsedReport(result.report_id, result.report_id, None, result.error, result.seconds)
+    try:
+        metadata = result.data.get("reportMetadata", {})
+        report_format = metadata.get("reportFormat", "UNKNOWN")
+        frame = parse_fact_map(
+            result.data.get("factMap", {}),
+            metadata.get("detailColumns", []),
+            report_format,
+            column_types(result.data),
+            RollupCube.from_report(result.data) if report_format in ("SUMMARY", "MATRIX") else None,
+        )
+    except Exception as e:
+        return ParsedReport(result.report_id, result.report_id, None, f"Exception: {str(e)}", result.seconds)
+    name = result.data.get("attributes", {}).get("reportName", result.report_id)
+    return ParsedReport(result.report_id, name, frame, None, result.seconds)
+
+
+def parsing(fetch):
+    """Wrap a fetch function (fetch_report, instances.fetch_report_async) so each worker parses its
+    report as soon as it arrives and only the ParsedReport outlives the worker."""
+    def fetch_parsed(*args, **kwargs):
+        return parse_result(fetch(*args, **kwargs))
+    return fetch_parsed
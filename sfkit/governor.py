@@ -0,0 +1,187 @@
+"""Rate limiting and retries for every call made through sfkit.client.
+
+Each instance URL gets a token bucket that spaces requests out, so a burst
+of concurrent fetches (or users clicking Execute again) does not run into
+the org's concurrency / rate limits.  Transient "back off" responses —
+429, 503 and SERVER_UNAVAILABLE — are retried with jittered exponential
+backoff (honouring Retry-After), but only while the instance's retry
+budget allows: retries earn credit from successful requests, so a
+persistently throttled org fails fast instead of multiplying its load.
+POSTs are retried on 429 only (the request was refused, so nothing was
+created); a 503 may come after the server acted, e.g. started a report
+instance.  REQUEST_LIMIT_EXCEEDED covers two limits: the concurrent
+long-running request limit ("ConcurrentPerOrgLongTxn") clears as other
+requests finish and is retried like a 429, while the daily API quota
+("TotalRequests") is returned at once, since it will not reset within any
+backoff.
+
+The Sforce-Limit-Info header of every response is recorded, so the apps
+can show how much of the daily API allowance is left.
+"""
+import random
+import re
+import threading
+import time
+
+DEFAULT_RATE = 10.0  # requests per second per instance
+DEFAULT_BURST = 20
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_MAX = 60.0
+RETRY_BUDGET_RATIO = 0.2  # retry credit earned per successful request
+RETRY_BUDGET_MAX = 10.0  # also the starting credit
+RETRY_STATUSES = {"GET": {429, 503}, "POST": {429}}
+TRANSIENT_ERROR_CODES = ("SERVER_UNAVAILABLE",)  # retried on GET, like a 503
+LIMIT_EXCEEDED_CODE = "REQUEST_LIMIT_EXCEEDED"
+DAILY_LIMIT_MARKER = "TotalRequests"  # in the message of the daily-quota variant of LIMIT_EXCEEDED_CODE
+
+stats = {"requests": 0, "retries": 0, "throttle_waits": 0, "throttle_seconds": 0.0, "budget_exhausted": 0,
+         "limit_exceeded": 0}
+api_limits = {}  # instance key -> {"used": int, "max": int}
+_stats_lock = threading.Lock()
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        stats[name] += amount
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RetryBudget:
+    """Retries spend one credit each; successful requests earn `ratio` credit up to `maximum`."""
+
+    def __init__(self, ratio=RETRY_BUDGET_RATIO, maximum=RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.maximum = maximum
+        self.credit = maximum
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self.credit = min(self.maximum, self.credit + self.ratio)
+
+    def spend(self):
+        with self._lock:
+            if self.credit < 1:
+                return False
+            self.credit -= 1
+            return True
+
+
+class Governor:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.bucket = TokenBucket(rate, burst)
+        self.budget = RetryBudget()
+
+
+def get_governor(instance_url):
+    key = instance_url.rstrip("/").lower()
+    with _governors_lock:
+        governor = _governors.get(key)
+        if governor is None:
+            governor = _governors[key] = Governor()
+        return governor
+
+
+def is_retryable(response, method="GET"):
+    if response.status_code in RETRY_STATUSES.get(method, RETRY_STATUSES["POST"]):
+        return True
+    if response.status_code in (400, 403):
+        # The body is a small JSON error list for these, so reading it here is cheap
+        if LIMIT_EXCEEDED_CODE in response.text:
+            # Concurrency limit: the request was refused, so even a POST can be sent again
+            return DAILY_LIMIT_MARKER not in response.text
+        return method == "GET" and any(code in response.text for code in TRANSIENT_ERROR_CODES)
+    return False
+
+
+def is_daily_limit(response):
+    return (response.status_code in (400, 403) and LIMIT_EXCEEDED_CODE in response.text
+            and DAILY_LIMIT_MARKER in response.text)
+
+
+def backoff_delay(attempt, response=None, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """Full-jitter exponential backoff; a Retry-After header, when present, sets the floor."""
+    delay = random.uniform(0, min(maximum, base * 2 ** attempt))
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(maximum, float(retry_after)))
+    return delay
+
+
+def record_limits(instance_url, response):
+    match = re.search(r"api-usage=(\d+)/(\d+)", response.headers.get("Sforce-Limit-Info", ""))
+    if match:
+        with _stats_lock:
+            api_limits[instance_url.rstrip("/").lower()] = {"used": int(match.group(1)), "max": int(match.group(2))}
+
+
+def remaining_api_calls(instance_url):
+    """API calls left today as last reported by the instance, or None if not seen yet."""
+    limits = api_limits.get(instance_url.rstrip("/").lower())
+    return limits["max"] - limits["used"] if limits else None
+
+
+def governed(instance_url, send, method="GET", max_attempts=MAX_ATTEMPTS):
+    """Call `send()` (which performs one `method` HTTP request) under the instance's rate limit and retry policy."""
+    governor = get_governor(instance_url)
+    attempt = 0
+    while True:
+        waited = governor.bucket.acquire()
+        if waited:
+            _count("throttle_waits")
+            _count("throttle_seconds", waited)
+        _count("requests")
+        response = send()
+        record_limits(instance_url, response)
+        if not is_retryable(response, method):
+            if is_daily_limit(response):
+                _count("limit_exceeded")
+            else:
+                governor.budget.earn()
+            return response
+        attempt += 1
+        if attempt >= max_attempts:
+            return response
+        if not governor.budget.spend():
+            _count("budget_exhausted")
+            return response
+        _count("retries")
+        delay = backoff_delay(attempt, response)
+        response.close()
+        time.sleep(delay)
+
+
+def summary():
+    with _stats_lock:
+        counters = dict(stats)
+        counters["throttle_seconds"] = round(counters["throttle_seconds"], 2)
+        counters["api_limits"] = {key: dict(value) for key, value in api_limits.items()}
+    return counters
@@ -0,0 +1,148 @@
+"""On-disk cache for rarely changing GET endpoints (describe, report types, ...).
+
+Entries are keyed by instance URL + request URL (which carries the API
+version and endpoint) + the caller's user (sfkit.client.user_key), so a
+body is only ever served back to the user that was allowed to fetch it,
+and a user's new token still finds their entries.  A fresh entry is
+served without touching the network; a stale one is revalidated with
+If-None-Match / If-Modified-Since and a 304 just renews it.  Only 200
+responses are stored.  Entries not used for MAX_ENTRY_AGE are swept.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sfkit.client import api_get, user_key
+
+DEFAULT_CACHE_DIR = os.environ.get("SFKIT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "sfkit", "http"))
+DEFAULT_TTL = 3600  # seconds
+MAX_ENTRY_AGE = 30 * 24 * 3600  # unused entries older than this are deleted
+SWEEP_INTERVAL = 3600  # seconds between sweeps of one directory, per process
+
+stats = {"hits": 0, "revalidated": 0, "misses": 0}
+_stats_lock = threading.Lock()
+_last_sweep = {}
+
+
+class CachedResponse:
+    """The subset of requests.Response the API helpers use, plus where it came from."""
+
+    def __init__(self, status_code, text, source, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.source = source  # "cache", "revalidated" or "network"
+        self.headers = headers or {}
+
+    @property
+    def from_cache(self):
+        return self.source != "network"
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+
+def sweep(directory, max_age=MAX_ENTRY_AGE):
+    """Delete files under `directory` not written or used for `max_age` seconds; returns how many."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:  # removed by another process meanwhile
+                pass
+    return removed
+
+
+def sweep_now_and_then(directory, max_age=MAX_ENTRY_AGE, interval=SWEEP_INTERVAL):
+    """sweep() at most once per `interval` per directory, so callers can invoke it on every write."""
+    now = time.time()
+    with _stats_lock:
+        if now - _last_sweep.get(directory, 0) < interval:
+            return 0
+        _last_sweep[directory] = now
+    return sweep(directory, max_age)
+
+
+def touch(path):
+    """Mark a file as used now, so sweeps keep it."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _entry_path(cache_dir, instance_url, url, access_token):
+    caller = user_key(access_token, instance_url)
+    key = hashlib.sha256(f"{instance_url.rstrip('/').lower()}|{caller}|{url}".encode()).hexdigest()
+    return os.path.join(cache_dir, key[:2], f"{key}.json")
+
+
+def _load(path):
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _store(path, entry):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as file:
+        json.dump(entry, file)
+    os.replace(tmp_path, path)  # readers never see a half-written entry
+
+
+def cached_get(access_token, instance_url, url, ttl=DEFAULT_TTL, force_refresh=False,
+               cache_dir=DEFAULT_CACHE_DIR, headers=None):
+    """GET `url` through the on-disk cache; returns a CachedResponse.
+
+    force_refresh skips both the fresh-entry shortcut and revalidation and
+    always downloads (and re-stores) the body.
+    """
+    path = _entry_path(cache_dir, instance_url, url, access_token)
+    entry = None if force_refresh else _load(path)
+
+    if entry and time.time() - entry["stored_at"] < ttl:
+        touch(path)
+        _count("hits")
+        return CachedResponse(200, entry["body"], "cache")
+
+    conditional = dict(headers or {})
+    if entry:
+        if entry.get("etag"):
+            conditional["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            conditional["If-Modified-Since"] = entry["last_modified"]
+
+    response = api_get(access_token, instance_url, url, headers=conditional)
+
+    if response.status_code == 304 and entry:
+        entry["stored_at"] = time.time()
+        _store(path, entry)
+        _count("revalidated")
+        return CachedResponse(200, entry["body"], "revalidated")
+
+    _count("misses")
+    if response.status_code == 200:
+        sweep_now_and_then(cache_dir)
+        _store(path, {
+            "url": url,
+            "stored_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body": response.text,
+        })
+    return CachedResponse(response.status_code, response.text, "network", response.headers)
@@ -0,0 +1,108 @@
+"""Asynchronous report runs through the Analytics API report-instances endpoints.
+
+A run is submitted with POST analytics/reports/{id}/instances, polled with
+exponential backoff until its status is Success or Error, and the finished
+instance (same shape as a synchronous run: reportMetadata, factMap, ...) is
+returned.  AsyncReportJob drives many of these in a background thread so
+the Streamlit script only renders progress.
+"""
+import random
+import threading
+import time
+
+from sfkit.client import DEFAULT_API_VERSION, api_get, api_post, api_url
+from sfkit.fetch import DEFAULT_CONCURRENCY, FetchResult, fetch_reports, parsing
+
+POLL_INITIAL_DELAY = 1.0  # seconds
+POLL_MAX_DELAY = 30.0
+POLL_TIMEOUT = 30 * 60
+FINISHED = {"Success", "Error"}
+
+
+class InstanceError(Exception):
+    pass
+
+
+def submit_instance(access_token, instance_url, report_id, api_version=DEFAULT_API_VERSION):
+    """Start an asynchronous run with details; returns the instance ID."""
+    url = api_url(instance_url, api_version, f"analytics/reports/{report_id}/instances?includeDetails=true")
+    response = api_post(access_token, instance_url, url)
+    if response.status_code not in (200, 201):
+        raise InstanceError(f"Error: {response.status_code} - {response.text}")
+    return response.json()["id"]
+
+
+def poll_instance(access_token, instance_url, report_id, instance_id, api_version=DEFAULT_API_VERSION,
+                  initial_delay=POLL_INITIAL_DELAY, max_delay=POLL_MAX_DELAY, timeout=POLL_TIMEOUT):
+    """Poll an instance with jittered exponential backoff until it finishes; returns its results."""
+    url = api_url(instance_url, api_version, f"analytics/reports/{report_id}/instances/{instance_id}")
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        time.sleep(delay * random.uniform(0.8, 1.2))
+        response = api_get(access_token, instance_url, url)
+        if response.status_code != 200:
+            raise InstanceError(f"Error: {response.status_code} - {response.text}")
+        data = response.json()
+        status = data.get("attributes", {}).get("status")
+        if status in FINISHED:
+            if status == "Error":
+                raise InstanceError(f"Report instance {instance_id} finished with status Error")
+            return data
+        if time.monotonic() + delay > deadline:
+            raise InstanceError(f"Report instance {instance_id} still {status} after {timeout}s")
+        delay = min(delay * 2, max_delay)
+
+
+def fetch_report_async(access_token, instance_url, report_id, api_version=DEFAULT_API_VERSION):
+    """Submit + poll one report; returns a FetchResult like sfkit.fetch.fetch_report."""
+    started = time.perf_counter()
+    try:
+        instance_id = submit_instance(access_token, instance_url, report_id, api_version)
+        data = poll_instance(access_token, instance_url, report_id, instance_id, api_version)
+        return FetchResult(report_id, data, None, time.perf_counter() - started)
+    except InstanceError as e:
+        error = str(e)
+    except Exception as e:
+        error = f"Exception: {str(e)}"
+    return FetchResult(report_id, None, error, time.perf_counter() - started)
+
+
+class AsyncReportJob:
+    """Runs many report instances in a background thread, `concurrency` in flight at a time.
+
+    Each report is parsed as it finishes, so `results` holds ParsedReports, not raw responses.
+    """
+
+    def __init__(self, access_token, instance_url, report_ids, api_version=DEFAULT_API_VERSION,
+                 concurrency=DEFAULT_CONCURRENCY):
+        self.report_ids = list(report_ids)
+        self.results = []
+        self.started = time.perf_counter()
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, args=(access_token, instance_url, api_version, concurrency), daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, access_token, instance_url, api_version, concurrency):
+        try:
+            for result in fetch_reports(access_token, instance_url, self.report_ids, api_version,
+                                        concurrency=concurrency, fetch=parsing(fetch_report_async)):
+                with self._lock:
+                    self.results.append(result)
+        finally:
+            self.finished_at = time.perf_counter()
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def snapshot(self):
+        """Results finished so far (a copy, safe to render while the job runs)."""
+        with self._lock:
+            return list(self.results)
+
+    def elapsed(self):
+        return (self.finished_at or time.perf_counter()) - self.started
@@ -0,0 +1,120 @@
+"""Run jq selectors over many saved report JSON files in parallel.
+
+    python -m sfkit.jqbatch -q '.factMap."T!T".aggregates' reports/ -o out.ndjson
+    python -m sfkit.jqbatch --queries selectors.json 'exports/**/*.json' --workers 8
+
+Each input file produces one NDJSON line with its results and timings.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sfkit.jqcache import compile_query
+
+DEFAULT_QUERY_NAME = "result"
+
+
+# Function to expand directories and glob patterns into a sorted list of files
+def collect_files(inputs):
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            files.update(glob.glob(os.path.join(item, "**", "*.json"), recursive=True))
+        else:
+            files.update(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+    return sorted(files)
+
+
+# Function to load named queries from a JSON object file ({"name": "jq program", ...})
+def load_queries(path):
+    with open(path, "r") as file:
+        queries = json.load(file)
+    if not isinstance(queries, dict) or not all(isinstance(q, str) for q in queries.values()):
+        raise ValueError(f"{path} must be a JSON object mapping names to jq programs")
+    return queries
+
+
+# Function run in each worker process: parse one file and apply every query to it
+def run_file(path, queries):
+    started = time.perf_counter()
+    record = {"file": path, "results": {}, "errors": {}, "query_ms": {}}
+    try:
+        with open(path, "rb") as file:
+            data = json.load(file)
+    except Exception as e:
+        record["errors"]["_load"] = str(e)
+        data = None
+    record["parse_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    if data is not None:
+        for name, query in queries.items():
+            query_started = time.perf_counter()
+            try:
+                record["results"][name] = compile_query(query).input(data).all()
+            except Exception as e:
+                record["errors"][name] = str(e)
+            record["query_ms"][name] = round((time.perf_counter() - query_started) * 1000, 3)
+
+    record["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return record
+
+
+def _run_file_args(args):
+    return run_file(*args)
+
+
+def run_batch(files, queries, workers=None, chunksize=None):
+    """Yield one result record per file, in input order, using a process pool."""
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(files) // (workers * 4))
+    tasks = [(path, queries) for path in files]
+    if workers == 1:
+        yield from map(_run_file_args, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_run_file_args, tasks, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sfkit.jqbatch", description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-q", "--query", help="single jq program to run")
+    source.add_argument("--queries", help="JSON file of named jq programs")
+    parser.add_argument("inputs", nargs="+", help="report JSON files, directories or glob patterns")
+    parser.add_argument("-o", "--output", help="NDJSON output file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    try:
+        queries = load_queries(args.queries) if args.queries else {DEFAULT_QUERY_NAME: args.query}
+        for query in queries.values():
+            compile_query(query)  # fail fast on a bad program before forking workers
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    files = collect_files(args.inputs)
+    if not files:
+        parser.error("no input files matched")
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    started = time.perf_counter()
+    failed = 0
+    try:
+        for record in run_batch(files, queries, args.workers):
+            failed += bool(record["errors"])
+            out.write(json.dumps(record) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{len(files)} files, {failed} with errors, {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import jq
+
+DEFAULT_MAX_PROGRAMS = 128
+
+
+class CompiledQueryCache:
+    """Size-bounded LRU of compiled jq programs keyed by query text."""
+
+    def __init__(self, max_size=DEFAULT_MAX_PROGRAMS):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._programs = OrderedDict()
+        self._lock = threading.Lock()  # Streamlit runs each session in its own thread
+
+    def get(self, query):
+        """Return the compiled program for `query`, compiling it on a miss."""
+        with self._lock:
+            program = self._programs.get(query)
+            if program is not None:
+                self._programs.move_to_end(query)
+                self.hits += 1
+                return program
+
+        # Compile outside the lock; invalid queries raise and are never cached
+        program = jq.compile(query)
+
+        with self._lock:
+            self.misses += 1
+            self._programs[query] = program
+            self._programs.move_to_end(query)
+            while len(self._programs) > self.max_size:
+                self._programs.popitem(last=False)
+        return program
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._programs),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Process-wide cache shared by every session (modules survive Streamlit reruns)
+compiled_queries = CompiledQueryCache()
+
+
+def compile_query(query):
+    """Compile `query` through the process-wide cache."""
+    return compiled_queries.get(query)
+
+
+DEFAULT_DOCUMENT_BUDGET = 512 * 1024 * 1024  # bytes of uploaded JSON kept parsed
+PARSED_SIZE_FACTOR = 4  # rough in-memory size of parsed JSON vs. its source bytes
+
+
+class ParsedDocument:
+    """A parsed upload plus its pretty-printed text, rendered on first use."""
+
+    def __init__(self, digest, data, source_size):
+        self.digest = digest
+        self.data = data
+        self.source_size = source_size
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = json.dumps(self.data, indent=2)
+        return self._text
+
+    def preview(self, max_chars):
+        """Return at most `max_chars` of the pretty text without rendering the rest."""
+        if self._text is not None:
+            return self._text[:max_chars], len(self._text) > max_chars
+        parts = []
+        size = 0
+        for chunk in json.JSONEncoder(indent=2).iterencode(self.data):
+            parts.append(chunk)
+            size += len(chunk)
+            if size > max_chars:
+                return "".join(parts)[:max_chars], True
+        return "".join(parts), False
+
+    def cost(self):
+        return self.source_size * PARSED_SIZE_FACTOR + (len(self._text) if self._text else 0)
+
+
+class DocumentCache:
+    """Parse-once cache of JSON uploads keyed by a hash of their bytes.
+
+    Entries are evicted least-recently-used first once their estimated
+    footprint exceeds `budget` bytes.  A single document larger than the
+    budget is returned but never retained.
+    """
+
+    def __init__(self, budget=DEFAULT_DOCUMENT_BUDGET):
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, raw_bytes):
+        """Return the ParsedDocument for `raw_bytes`, parsing it on a miss."""
+        digest = hashlib.blake2b(raw_bytes, digest_size=16).hexdigest()
+        with self._lock:
+            doc = self._docs.get(digest)
+            if doc is not None:
+                self._docs.move_to_end(digest)
+                self.hits += 1
+                return doc
+
+        doc = ParsedDocument(digest, json.loads(raw_bytes), len(raw_bytes))
+
+        with self._lock:
+            self.misses += 1
+            self._docs[digest] = doc
+            self._evict()
+        return doc
+
+    def _evict(self):
+        while self._docs and self.used() > self.budget:
+            self._docs.popitem(last=False)
+
+    def used(self):
+        return sum(doc.cost() for doc in self._docs.values())
+
+    def stats(self):
+        with self._lock:
+            self._evict()  # pretty text may have been rendered since the last insert
+            return {
+                "documents": len(self._docs),
+                "used": self.used(),
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Process-wide parsed-upload cache shared by every session
+parsed_documents = DocumentCache()
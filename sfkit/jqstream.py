@@ -0,0 +1,95 @@
+import json
+import re
+
+import ijson
+from ijson.common import ObjectBuilder
+
+from sfkit.jqcache import compile_query
+
+# One path step: .key, ."quoted key" or [] (iterate every array element / object value)
+_STEP = re.compile(r'\s*(?:\.\s*"((?:[^"\\]|\\.)*)"|\.\s*([A-Za-z_][A-Za-z0-9_]*)|\.?\s*\[\s*\])')
+
+_VALUE_START = {"start_map", "start_array", "null", "boolean", "integer", "double", "number", "string"}
+
+WILDCARD = None
+_ITEM = object()  # path entry of an array element; only WILDCARD matches it
+
+
+def parse_stream_path(path):
+    """Turn a jq-style path like `.factMap[].rows[]` into a list of steps.
+
+    Named steps are kept as strings, `[]` becomes WILDCARD.  Only plain key
+    access and iteration are streamable; anything else raises ValueError.
+    """
+    path = path.strip()
+    if path in ("", "."):
+        return []
+    steps = []
+    pos = 0
+    while pos < len(path):
+        match = _STEP.match(path, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unsupported stream path near {path[pos:]!r}; use .key, .\"key\" and [] only")
+        quoted, bare = match.group(1), match.group(2)
+        if quoted is not None:
+            steps.append(json.loads(f'"{quoted}"'))  # JSON string escapes, non-ASCII kept as-is
+        elif bare is not None:
+            steps.append(bare)
+        else:
+            steps.append(WILDCARD)
+        pos = match.end()
+    return steps
+
+
+def _matches(path, steps):
+    """Whether the container path (map keys, or _ITEM for array elements) is selected by `steps`."""
+    return all(step is WILDCARD or step == key for step, key in zip(steps, path))
+
+
+def stream_items(fileobj, path):
+    """Yield every value found at `path`, holding only one value in memory at a time."""
+    steps = parse_stream_path(path)
+    # One [kind, key] frame per open container above the current value; the
+    # path is matched on these rather than ijson's dotted prefix, so keys
+    # containing "." or named "item" are not confused with nesting or arrays.
+    stack = []
+    builder = None
+    depth = 0
+    for _, event, value in ijson.parse(fileobj, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    yield builder.value
+                    builder = None
+            continue
+
+        if event == "map_key":
+            stack[-1][1] = value
+            continue
+        if event in ("end_map", "end_array"):
+            stack.pop()
+            continue
+        if event not in _VALUE_START:
+            continue
+        if len(stack) == len(steps) and _matches([key for _, key in stack], steps):
+            if event not in ("start_map", "start_array"):
+                yield value
+                continue
+            builder = ObjectBuilder()
+            builder.event(event, value)
+            depth = 1
+        elif event == "start_map":
+            stack.append(["map", None])
+        elif event == "start_array":
+            stack.append(["array", _ITEM])
+
+
+def stream_query(fileobj, path, query="."):
+    """Run the jq `query` on each value at `path` and yield results as they are produced."""
+    program = compile_query(query)
+    for item in stream_items(fileobj, path):
+        yield from program.input(item).all()
@@ -0,0 +1,145 @@
+"""Paged listing of every report / dashboard in an org, plus a local name/ID index.
+
+analytics/reports and analytics/dashboards only return recently viewed
+items in one blob, so the full listing goes through the REST query
+endpoint and follows nextRecordsUrl one page (up to 2,000 records) at a
+time.  The records are kept in a small per-instance index on disk, so
+search and paging run locally without calling the API again.  Indexes are
+kept per user (sfkit.client.user_key), since SOQL visibility differs per
+user; indexes nobody has loaded for MAX_INDEX_AGE are swept.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from urllib.parse import urlencode
+
+import pandas as pd
+
+from sfkit.client import DEFAULT_API_VERSION, api_get, api_url, user_key
+from sfkit.httpcache import DEFAULT_CACHE_DIR, sweep_now_and_then, touch
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "index")
+MAX_INDEX_AGE = 30 * 24 * 3600
+
+# SOQL and the column shown as the item's name, per kind of listing
+LISTINGS = {
+    "reports": (
+        "SELECT Id, Name, DeveloperName, FolderName, Format, LastModifiedDate FROM Report ORDER BY Name",
+        "Name",
+    ),
+    "dashboards": (
+        "SELECT Id, Title, DeveloperName, FolderName, LastModifiedDate FROM Dashboard ORDER BY Title",
+        "Title",
+    ),
+}
+
+
+class ListingError(Exception):
+    pass
+
+
+def iter_query_pages(access_token, instance_url, soql, api_version=DEFAULT_API_VERSION):
+    """Yield the records of a SOQL query one API page at a time, following nextRecordsUrl."""
+    url = api_url(instance_url, api_version, "query?" + urlencode({"q": soql}))
+    while url:
+        response = api_get(access_token, instance_url, url)
+        if response.status_code != 200:
+            raise ListingError(f"Error: {response.status_code} - {response.text}")
+        page = response.json()
+        yield [{k: v for k, v in record.items() if k != "attributes"} for record in page.get("records", [])]
+        url = None if page.get("done", True) else page.get("nextRecordsUrl")
+
+
+def index_path(access_token, instance_url, kind, index_dir=DEFAULT_INDEX_DIR):
+    """Per instance and per user: SOQL only returns what the token's user can see."""
+    caller = user_key(access_token, instance_url)
+    key = hashlib.sha256(f"{instance_url.rstrip('/').lower()}|{caller}".encode()).hexdigest()[:16]
+    return os.path.join(index_dir, f"{key}-{kind}.json")
+
+
+class NameIndex:
+    """Records of one listing with case-insensitive search over name, ID and folder."""
+
+    def __init__(self, kind, records, built_at=None):
+        self.kind = kind
+        self.name_field = LISTINGS[kind][1]
+        self.built_at = built_at or time.time()
+        self.frame = pd.DataFrame.from_records(records)
+        if self.frame.empty:
+            self._haystack = pd.Series([], dtype=str)
+        else:
+            # One lower-cased string per row, so a search is a single vectorized contains()
+            searchable = [column for column in (self.name_field, "Id", "DeveloperName", "FolderName")
+                          if column in self.frame.columns]
+            self._haystack = self.frame[searchable].fillna("").astype(str).agg(" ".join, axis=1).str.lower()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def search(self, text=""):
+        text = text.strip().lower()
+        if not text:
+            return self.frame
+        return self.frame[self._haystack.str.contains(text, regex=False).to_numpy()]
+
+    def choices(self, frame=None):
+        """{"Name (Id)": Id} for select boxes, over `frame` (e.g. a search result) or the whole index."""
+        frame = self.frame if frame is None else frame
+        return {f"{name} ({record_id})": record_id
+                for name, record_id in zip(frame.get(self.name_field, []), frame.get("Id", []))}
+
+    def records(self):
+        return self.frame.to_dict("records")
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump({"kind": self.kind, "built_at": self.built_at, "records": self.records()}, file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r") as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return cls(saved["kind"], saved["records"], saved["built_at"])
+
+
+def page_of(frame, page, page_size):
+    """Rows of 1-based `page`; returns (rows, page count)."""
+    pages = max(1, -(-len(frame) // page_size))
+    page = min(max(page, 1), pages)
+    return frame.iloc[(page - 1) * page_size:page * page_size], pages
+
+
+def build_index(access_token, instance_url, kind, api_version=DEFAULT_API_VERSION,
+                index_dir=DEFAULT_INDEX_DIR, progress=None):
+    """Download the full listing page by page, save it as the local index and return it.
+
+    `progress(count)` is called after each API page with the records seen so far.
+    """
+    records = []
+    soql, _ = LISTINGS[kind]
+    for page in iter_query_pages(access_token, instance_url, soql, api_version):
+        records.extend(page)
+        if progress:
+            progress(len(records))
+    index = NameIndex(kind, records)
+    if index_dir:
+        sweep_now_and_then(index_dir, MAX_INDEX_AGE)
+        index.save(index_path(access_token, instance_url, kind, index_dir))
+    return index
+
+
+def load_index(access_token, instance_url, kind, index_dir=DEFAULT_INDEX_DIR):
+    """The index this user saved for an instance, or None if it was never built."""
+    path = index_path(access_token, instance_url, kind, index_dir)
+    index = NameIndex.load(path)
+    if index is not None:
+        touch(path)
+    return index
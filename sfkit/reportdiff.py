@@ -0,0 +1,111 @@
+"""Row and aggregate diff between two runs of the same report.
+
+Detail rows are matched on one or more key columns (e.g. the record ID)
+with a single hash join (DataFrame.merge), so two 200k-row snapshots diff
+in seconds.  Rows only in the new run are "added", rows only in the old
+run "removed", and matched rows with any differing cell are listed per
+changed column with the old and new value.  Aggregates are diffed the same
+way, keyed by their grouping columns.
+"""
+from collections import namedtuple
+
+import pandas as pd
+
+from sfkit.factmap import report_frames
+
+OCCURRENCE = "_occurrence"  # disambiguates rows whose key repeats within one run
+CHANGED_OCCURRENCE = "Occurrence"  # the same, as kept in the changed-cells frame
+
+ReportDiff = namedtuple("ReportDiff", ["added", "removed", "changed", "aggregates"])
+GROUPING_COLUMNS = ("Grouping", "Row Group", "Column Group", "row_group", "col_group")
+
+
+def suggest_key_columns(old, new):
+    """Columns that identify a row uniquely in both frames, best candidates (named like IDs) first."""
+    candidates = [name for name in old.columns if name in new.columns
+                  and old[name].notna().all() and new[name].notna().all()
+                  and old[name].is_unique and new[name].is_unique]
+    return sorted(candidates, key=lambda name: not str(name).upper().endswith("ID"))
+
+
+def _comparable(column):
+    # Categoricals with different category sets cannot be compared with ==
+    return column.astype(object) if isinstance(column.dtype, pd.CategoricalDtype) else column
+
+
+def diff_frames(old, new, key_columns, compare_columns=None):
+    """Diff two frames on `key_columns`; returns (added, removed, changed).
+
+    `changed` is long-form: the key columns plus "Occurrence", "Column",
+    "Old" and "New", one row per changed cell.  Keys that repeat within a
+    run are matched by their order of appearance, which "Occurrence"
+    (0 for the first row with a key) records, so the changed rows are the
+    distinct (key columns, Occurrence) pairs; see changed_row_count.
+    """
+    key_columns = list(key_columns)
+    if not key_columns:
+        raise ValueError("Pick at least one key column to match rows on")
+    compare_columns = [name for name in (compare_columns or old.columns)
+                       if name in new.columns and name not in key_columns]
+
+    old = old.assign(**{OCCURRENCE: old.groupby(key_columns, sort=False, observed=True).cumcount()})
+    new = new.assign(**{OCCURRENCE: new.groupby(key_columns, sort=False, observed=True).cumcount()})
+    keys = key_columns + [OCCURRENCE]
+    merged = old[keys + compare_columns].merge(new[keys + compare_columns], on=keys, how="outer",
+                                               suffixes=("_old", "_new"), indicator=True)
+
+    added = new.merge(merged.loc[merged["_merge"] == "right_only", keys], on=keys)
+    removed = old.merge(merged.loc[merged["_merge"] == "left_only", keys], on=keys)
+    both = merged[merged["_merge"] == "both"]
+
+    changes = []
+    for name in compare_columns:
+        before, after = _comparable(both[f"{name}_old"]), _comparable(both[f"{name}_new"])
+        differs = ~((before == after) | (before.isna() & after.isna()))
+        if differs.any():
+            rows = both.loc[differs, keys]
+            changes.append(rows.assign(Column=name, Old=before[differs].to_numpy(), New=after[differs].to_numpy()))
+    changed = (pd.concat(changes, ignore_index=True) if changes
+               else pd.DataFrame(columns=keys + ["Column", "Old", "New"]))
+
+    def tidy(frame):
+        return frame.drop(columns=OCCURRENCE).reset_index(drop=True)
+
+    return tidy(added), tidy(removed), changed.rename(columns={OCCURRENCE: CHANGED_OCCURRENCE})
+
+
+def changed_row_count(changed, key_columns):
+    """Number of matched rows with at least one changed cell in a diff_frames `changed` frame."""
+    return len(changed[list(key_columns) + [CHANGED_OCCURRENCE]].drop_duplicates())
+
+
+def diff_aggregates(old, new):
+    """Changed / added / removed aggregate values keyed by the grouping columns, long-form."""
+    if old is None or new is None:
+        return None
+    key_columns = [name for name in GROUPING_COLUMNS if name in old.columns and name in new.columns]
+    if not key_columns:
+        return None
+    added, removed, changed = diff_frames(old, new, key_columns)
+    changed = changed.drop(columns=CHANGED_OCCURRENCE)  # grouping keys are unique per run
+    value_columns = [name for name in new.columns if name not in key_columns]
+    added = added.melt(id_vars=key_columns, value_vars=value_columns, var_name="Column", value_name="New")
+    removed = removed.melt(id_vars=key_columns, value_vars=[name for name in old.columns if name not in key_columns],
+                           var_name="Column", value_name="Old")
+    return pd.concat([changed.assign(Change="changed"), added.assign(Change="added"),
+                      removed.assign(Change="removed")], ignore_index=True)
+
+
+def diff_reports(old_report, new_report, key_columns, value_key="value"):
+    """Diff two report responses: detail rows on `key_columns`, aggregates on their grouping."""
+    old_details, old_aggregates = report_frames(old_report, value_key)
+    new_details, new_aggregates = report_frames(new_report, value_key)
+    if old_details is None and new_details is None:
+        empty = pd.DataFrame()
+        added = removed = changed = empty
+    else:
+        # A run without detail rows diffs as an empty frame of the other run's columns
+        old_details = new_details.iloc[0:0] if old_details is None else old_details
+        new_details = old_details.iloc[0:0] if new_details is None else new_details
+        added, removed, changed = diff_frames(old_details, new_details, key_columns)
+    return ReportDiff(added, removed, changed, diff_aggregates(old_aggregates, new_aggregates))
@@ -0,0 +1,295 @@
+"""Local SQLite store of report snapshots for trend analysis across runs.
+
+Every ingest records one snapshot (report ID + time) and writes its factMap
+in long form: one row per aggregate of each section and one row per detail
+cell, both tagged with the section's row / column grouping.  Indexes on
+(report, aggregate, grouping, time) and (snapshot, column, grouping) make
+"today vs. the last 30 days" a single indexed query instead of re-fetching
+and re-parsing old JSON files.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from sfkit.factmap import TOTAL, split_key
+from sfkit.httpcache import DEFAULT_CACHE_DIR
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "reports.sqlite")
+DAY = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    report_id TEXT NOT NULL,
+    report_name TEXT,
+    report_format TEXT,
+    taken_at REAL NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS snapshots_report ON snapshots (report_id, taken_at);
+
+CREATE TABLE IF NOT EXISTS aggregates (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    report_id TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    row_group TEXT NOT NULL,
+    col_group TEXT NOT NULL,
+    aggregate TEXT NOT NULL,
+    value REAL,
+    label TEXT
+);
+CREATE INDEX IF NOT EXISTS aggregates_trend ON aggregates (report_id, aggregate, row_group, col_group, taken_at);
+CREATE INDEX IF NOT EXISTS aggregates_snapshot ON aggregates (snapshot_id);
+
+CREATE TABLE IF NOT EXISTS cells (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    row_no INTEGER NOT NULL,
+    row_group TEXT NOT NULL,
+    col_group TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    value TEXT,
+    number REAL
+);
+CREATE INDEX IF NOT EXISTS cells_column ON cells (snapshot_id, column_name, row_group, col_group);
+"""
+
+
+def cell_number(value):
+    """Numeric form of a cell value (currency amounts included), or None."""
+    if isinstance(value, dict):
+        value = value.get("amount")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def cell_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def fact_map_rows(fact_map, value_key="value"):
+    """(factMap key, [cell values]) for every detail row of a factMap, in order."""
+    for key, section in fact_map.items():
+        for row in section.get("rows", []):
+            yield key, [cell.get(value_key) for cell in row.get("dataCells", [])]
+
+
+class SnapshotWriter:
+    """Writes one snapshot inside an open transaction; see ReportStore.writer.
+
+    Takes the events of sfkit.factmap_stream.iter_report (add) or plain
+    detail rows (add_rows), so a streamed report is stored batch by batch
+    without its rows ever being held together.
+    """
+
+    def __init__(self, connection, taken_at):
+        self.connection = connection
+        self.taken_at = taken_at
+        self.report = {"factMap": {}}
+        self.row_count = 0
+        self._positional = False  # cells written before detailColumns were known
+        # Filled in by finish(), once the report's ID is known
+        self.snapshot_id = connection.execute("INSERT INTO snapshots (report_id, taken_at) VALUES ('', ?)",
+                                              (taken_at,)).lastrowid
+
+    def add(self, kind, name, payload):
+        """Take one ("meta" | "rows" | "section", name, payload) event of iter_report."""
+        if kind == "meta":
+            self.report[name] = payload
+        elif kind == "section":
+            self.report["factMap"][name] = payload
+        else:
+            self.add_rows((name, values) for values in payload)
+
+    def add_rows(self, rows):
+        """Write (factMap key, [cell values]) detail rows."""
+        columns = list(self.report.get("reportMetadata", {}).get("detailColumns", []))
+        if not columns:
+            # Salesforce sends factMap before reportMetadata; finish() renames these cells
+            self._positional = True
+
+        def cells():
+            for key, values in rows:
+                row_group, col_group = split_key(key)
+                row_no = self.row_count
+                self.row_count += 1
+                for position, value in enumerate(values):
+                    name = columns[position] if position < len(columns) else f"Column {position + 1}"
+                    yield self.snapshot_id, row_no, row_group, col_group, name, cell_text(value), cell_number(value)
+
+        self.connection.executemany("INSERT INTO cells VALUES (?, ?, ?, ?, ?, ?, ?)", cells())
+
+    def finish(self):
+        """Write the aggregates and fill in the snapshot row, once the whole report has been added."""
+        metadata = self.report.get("reportMetadata", {})
+        attributes = self.report.get("attributes", {})
+        report_id = attributes.get("reportId") or metadata.get("id")
+        if not report_id:
+            raise ValueError("The report has no reportId / reportMetadata.id to file the snapshot under")
+        if self._positional:
+            for position, name in enumerate(metadata.get("detailColumns", [])):
+                self.connection.execute(
+                    "UPDATE cells SET column_name = ? WHERE snapshot_id = ? AND column_name = ?",
+                    (name, self.snapshot_id, f"Column {position + 1}"),
+                )
+
+        aggregate_names = list(metadata.get("aggregates", []))
+        aggregates = []
+        for key, section in self.report.get("factMap", {}).items():
+            row_group, col_group = split_key(key)
+            for position, aggregate in enumerate(section.get("aggregates", [])):
+                name = aggregate_names[position] if position < len(aggregate_names) else f"Aggregate {position + 1}"
+                aggregates.append((self.snapshot_id, report_id, self.taken_at, row_group, col_group, name,
+                                   cell_number(aggregate.get("value")), aggregate.get("label")))
+        self.connection.executemany("INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?)", aggregates)
+        self.connection.execute(
+            "UPDATE snapshots SET report_id = ?, report_name = ?, report_format = ?, row_count = ? WHERE id = ?",
+            (report_id, attributes.get("reportName") or metadata.get("name"), metadata.get("reportFormat"),
+             self.row_count, self.snapshot_id),
+        )
+
+
+class ReportStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()  # one writer at a time per process; SQLite handles other processes
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            with connection:  # commits, or rolls back on error
+                yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def writer(self, taken_at=None):
+        """A SnapshotWriter in one transaction: committed when the block ends, rolled back if it
+        raises (nothing is stored for a report that failed half-way)."""
+        with self._lock, self._connect() as connection:
+            writer = SnapshotWriter(connection, time.time() if taken_at is None else taken_at)
+            yield writer
+            writer.finish()
+
+    def ingest(self, report, rows=None, taken_at=None, value_key="value"):
+        """Store one snapshot of a parsed report; returns the snapshot ID.
+
+        `rows` is an iterable of (factMap key, [cell values]) for reports whose
+        detail rows are not kept in `report`; by default they are read from
+        report["factMap"].  Streamed reports go through writer() instead.
+        """
+        with self.writer(taken_at) as writer:
+            writer.report = report
+            writer.add_rows(fact_map_rows(report.get("factMap", {}), value_key) if rows is None else rows)
+        return writer.snapshot_id
+
+    def _query(self, sql, params=()):
+        with self._connect() as connection:
+            return pd.read_sql_query(sql, connection, params=params)
+
+    def reports(self):
+        """One row per stored report: ID, latest name, snapshot count and time range."""
+        return self._query(
+            "SELECT report_id, MAX(report_name) AS report_name, COUNT(*) AS snapshots, "
+            "MIN(taken_at) AS first_taken_at, MAX(taken_at) AS last_taken_at "
+            "FROM snapshots GROUP BY report_id ORDER BY last_taken_at DESC"
+        )
+
+    def snapshots(self, report_id):
+        return self._query("SELECT * FROM snapshots WHERE report_id = ? ORDER BY taken_at", (report_id,))
+
+    def aggregate_names(self, report_id):
+        frame = self._query("SELECT DISTINCT aggregate FROM aggregates WHERE report_id = ?", (report_id,))
+        return list(frame["aggregate"])
+
+    def aggregate_history(self, report_id, aggregate, since=None, row_group=None, col_group=TOTAL):
+        """Values of one aggregate per snapshot and grouping (all row groups unless `row_group`)."""
+        sql = ("SELECT taken_at, row_group, col_group, value FROM aggregates "
+               "WHERE report_id = ? AND aggregate = ? AND col_group = ? AND taken_at >= ?")
+        params = [report_id, aggregate, col_group, since or 0]
+        if row_group is not None:
+            sql += " AND row_group = ?"
+            params.append(row_group)
+        frame = self._query(sql + " ORDER BY taken_at", params)
+        frame["taken_at"] = pd.to_datetime(frame["taken_at"], unit="s")
+        return frame
+
+    def compare_to_history(self, report_id, aggregate, days=30, col_group=TOTAL):
+        """The latest snapshot's aggregate per row group next to its mean / min / max over the
+        previous `days` (the latest snapshot itself excluded)."""
+        latest = self._query("SELECT id, taken_at FROM snapshots WHERE report_id = ? ORDER BY taken_at DESC LIMIT 1",
+                             (report_id,))
+        if latest.empty:
+            return pd.DataFrame()
+        snapshot_id, taken_at = int(latest["id"][0]), float(latest["taken_at"][0])
+        frame = self._query(
+            "SELECT now.row_group, now.value AS latest, AVG(past.value) AS mean, MIN(past.value) AS min, "
+            "MAX(past.value) AS max, COUNT(past.value) AS snapshots "
+            "FROM aggregates AS now LEFT JOIN aggregates AS past "
+            "ON past.report_id = now.report_id AND past.aggregate = now.aggregate "
+            "AND past.row_group = now.row_group AND past.col_group = now.col_group "
+            "AND past.taken_at >= ? AND past.taken_at < ? "
+            "WHERE now.snapshot_id = ? AND now.aggregate = ? AND now.col_group = ? "
+            "GROUP BY now.row_group, now.value ORDER BY now.row_group",
+            (taken_at - days * DAY, taken_at, snapshot_id, aggregate, col_group),
+        )
+        frame["change_vs_mean"] = frame["latest"] - frame["mean"]
+        return frame
+
+    def snapshot_frame(self, snapshot_id, columns=None):
+        """Rebuild one snapshot's detail rows as a wide DataFrame (text values, as stored)."""
+        sql = "SELECT row_no, row_group, col_group, column_name, value FROM cells WHERE snapshot_id = ?"
+        params = [snapshot_id]
+        if columns:
+            sql += f" AND column_name IN ({', '.join('?' * len(columns))})"
+            params.extend(columns)
+        cells = self._query(sql + " ORDER BY rowid", params)  # insertion order keeps the report's column order
+        if cells.empty:
+            return None
+        order = list(dict.fromkeys(cells["column_name"]))
+        frame = cells.pivot(index=["row_no", "row_group", "col_group"], columns="column_name", values="value")[order]
+        frame.columns.name = None
+        return frame.reset_index().drop(columns="row_no")
+
+    def snapshot_aggregates(self, snapshot_id):
+        """One snapshot's aggregates as row_group, col_group + one column per aggregate."""
+        values = self._query("SELECT row_group, col_group, aggregate, value FROM aggregates "
+                             "WHERE snapshot_id = ? ORDER BY rowid", (snapshot_id,))
+        if values.empty:
+            return None
+        order = list(dict.fromkeys(values["aggregate"]))
+        frame = values.pivot(index=["row_group", "col_group"], columns="aggregate", values="value")[order]
+        frame.columns.name = None
+        return frame.reset_index()
+
+    def delete_before(self, report_id, taken_before):
+        """Drop a report's snapshots older than `taken_before`; returns how many were deleted."""
+        with self._lock, self._connect() as connection:
+            return connection.execute("DELETE FROM snapshots WHERE report_id = ? AND taken_at < ?",
+                                      (report_id, taken_before)).rowcount
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_report_store(path=DEFAULT_DB_PATH):
+    """Return the process-wide ReportStore for `path`."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ReportStore(path)
+        return _stores[key]
@@ -0,0 +1,181 @@
+"""Numeric rollup cube over the aggregates of a SUMMARY or MATRIX factMap.
+
+Salesforce already sends an aggregate section for every grouping level
+("0!T" a top row group, "0_1!T" its second child, "T!2" a column total,
+"T!T" the grand total).  RollupCube reads them once into a dense float
+array indexed [row key, column key, aggregate], so drilling up / down and
+re-grouping by another level are array lookups, not passes over raw rows.
+The grouping keys come from the report's MatrixIndex (kept as `.matrix`
+for section lookups), which also serves SUMMARY reports as a one-column
+matrix.
+Levels missing from the response are rolled up from their children for
+additive and min / max aggregates.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from sfkit.factmap import TOTAL, MatrixIndex, detail_frame
+
+# Aggregate name prefixes (reportMetadata.aggregates) and how a parent combines its children
+ROLLUPS = {"s": np.nansum, "mx": np.nanmax, "m": np.nanmin}
+
+
+def numeric_value(value):
+    """Aggregate value as a float (currency amounts included); NaN when not numeric."""
+    if isinstance(value, dict):
+        value = value.get("amount")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+def depth(key):
+    """Grouping level of a key: 0 for the total "T", 1 for "0", 2 for "0_1", ..."""
+    return 0 if key == TOTAL else key.count("_") + 1
+
+
+def parent(key):
+    if key == TOTAL:
+        return None
+    return key.rpartition("_")[0] or TOTAL
+
+
+def _rollup(name):
+    if name == "RowCount":
+        return np.nansum
+    return ROLLUPS.get(name.partition("!")[0])
+
+
+def _children(keys):
+    """parent key -> its child keys, in `keys` order."""
+    children = {}
+    for key in keys:
+        if key != TOTAL:
+            children.setdefault(parent(key), []).append(key)
+    return children
+
+
+def _ordered(keys):
+    """Keys in factMap order at each level, parents before their children, totals last."""
+    keys = set(keys)
+    for key in list(keys):  # make sure every ancestor has a slot so rollups have somewhere to go
+        while key != TOTAL:
+            key = parent(key)
+            keys.add(key)
+
+    def sort_key(key):
+        return [int(part) if part.isdigit() else part for part in key.split("_")] if key != TOTAL else [float("inf")]
+
+    return sorted(keys, key=sort_key)
+
+
+class RollupCube:
+    """Dense [row key, column key, aggregate] array of a report's numeric aggregates."""
+
+    def __init__(self, fact_map, aggregate_names=None, value_key="value", matrix=None):
+        self.matrix = matrix or MatrixIndex(fact_map)  # keys are split once, there
+        self.row_keys = _ordered(self.matrix.by_row)
+        self.col_keys = _ordered(self.matrix.by_column)
+        width = max((len(section.get("aggregates", [])) for section in fact_map.values()), default=0)
+        names = list(aggregate_names or [])[:width]
+        self.aggregates = names + [f"Aggregate {i + 1}" for i in range(len(names), width)]
+        self._rows = {key: i for i, key in enumerate(self.row_keys)}
+        self._cols = {key: i for i, key in enumerate(self.col_keys)}
+        self._child_keys = {"row": _children(self.row_keys), "col": _children(self.col_keys)}
+
+        self.values = np.full((len(self.row_keys), len(self.col_keys), width), np.nan)
+        for row, cells_by_col in self.matrix.by_row.items():
+            for col, section in cells_by_col.items():
+                cells = [numeric_value(aggregate.get(value_key)) for aggregate in section.get("aggregates", [])]
+                self.values[self._rows[row], self._cols[col], :len(cells)] = cells
+        self._fill_missing()
+
+    @classmethod
+    def from_report(cls, report, value_key="value"):
+        return cls(report.get("factMap", {}), report.get("reportMetadata", {}).get("aggregates"), value_key)
+
+    def _fill_missing(self):
+        """Roll children up into parents the response left empty, deepest level first."""
+        for position, name in enumerate(self.aggregates):
+            combine = _rollup(name)
+            if combine is None:  # averages, unique counts, formulas: not derivable from children
+                continue
+            plane = self.values[:, :, position]
+            for keys, index, axis in ((self.row_keys, self._rows, 0), (self.col_keys, self._cols, 1)):
+                child_keys = self._child_keys["row" if axis == 0 else "col"]
+                for key in sorted(keys, key=depth, reverse=True):
+                    children = [index[child] for child in child_keys.get(key, [])]
+                    if not children:
+                        continue
+                    target = plane[index[key]] if axis == 0 else plane[:, index[key]]
+                    missing = np.isnan(target)
+                    if missing.any():
+                        block = plane[children] if axis == 0 else plane[:, children].T
+                        with warnings.catch_warnings():
+                            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns stay NaN below
+                            rolled = combine(block, axis=0)
+                        rolled[np.isnan(block).all(axis=0)] = np.nan
+                        target[missing] = rolled[missing]
+
+    def _aggregate(self, aggregate):
+        return self.aggregates.index(aggregate) if isinstance(aggregate, str) else aggregate
+
+    def value(self, row=TOTAL, col=TOTAL, aggregate=0):
+        """One aggregate of one cell; NaN if the report has no such grouping."""
+        i, j = self._rows.get(row), self._cols.get(col)
+        if i is None or j is None:
+            return np.nan
+        return self.values[i, j, self._aggregate(aggregate)]
+
+    def children(self, key, axis="row"):
+        """Grouping keys one level below `key` on the row or column axis (drill-down)."""
+        return list(self._child_keys["row" if axis == "row" else "col"].get(key, []))
+
+    def max_depth(self, axis="row"):
+        return max(map(depth, self.row_keys if axis == "row" else self.col_keys), default=0)
+
+    def level(self, row_depth=1, col_depth=0, aggregate=0, row_labels=None, column_labels=None):
+        """Rows x columns DataFrame of one aggregate with both axes grouped at the given levels
+        (0 = total only), e.g. level(1, 0) is the top row groupings against the grand total."""
+        rows = [i for i, key in enumerate(self.row_keys) if depth(key) == row_depth]
+        cols = [j for j, key in enumerate(self.col_keys) if depth(key) == col_depth]
+        block = self.values[np.ix_(rows, cols, [self._aggregate(aggregate)])][:, :, 0]
+        row_names = [self.row_keys[i] for i in rows]
+        col_names = [self.col_keys[j] for j in cols]
+        return pd.DataFrame(
+            block,
+            index=[row_labels.get(key, key) for key in row_names] if row_labels else row_names,
+            columns=[column_labels.get(key, key) for key in col_names] if column_labels else col_names,
+        )
+
+    def frame(self, row_depth=None, col_depth=0):
+        """Long table of every aggregate per (row key, column key): one row per grouping cell.
+
+        `row_depth` restricts the rows to one level; the column axis defaults to totals.
+        """
+        rows = [i for i, key in enumerate(self.row_keys) if row_depth is None or depth(key) == row_depth]
+        cols = [j for j, key in enumerate(self.col_keys) if col_depth is None or depth(key) == col_depth]
+        block = self.values[np.ix_(rows, cols, range(len(self.aggregates)))].reshape(-1, len(self.aggregates))
+        frame = pd.DataFrame(block, columns=self.aggregates)
+        frame.insert(0, "Row Group", np.repeat([self.row_keys[i] for i in rows], len(cols)))
+        frame.insert(1, "Column Group", np.tile([self.col_keys[j] for j in cols], len(rows)))
+        return frame
+
+
+def parse_fact_map(fact_map, detail_columns, report_format, types=None, cube=None):
+    """The table the apps show for a report: typed detail rows for TABULAR, the aggregates per
+    grouping (from the rollup cube) for SUMMARY / MATRIX; None when there is nothing to show."""
+    if report_format == "TABULAR":
+        return detail_frame(fact_map, detail_columns, types=types)  # Typed columnar build, no per-row dicts
+
+    if report_format not in ("SUMMARY", "MATRIX") or not fact_map:
+        return None
+    cube = cube or RollupCube(fact_map)
+    if report_format == "SUMMARY":
+        frame = cube.frame(col_depth=0).drop(columns="Column Group").rename(columns={"Row Group": "Grouping"})
+    else:
+        frame = cube.frame(col_depth=None)
+    frame = frame.dropna(how="all", subset=cube.aggregates).reset_index(drop=True)
+    return frame if not frame.empty else None
@@ -0,0 +1,93 @@
+"""Streamlit widgets shared by the apps (the rest of sfkit does not import streamlit)."""
+import json
+import time
+
+import pandas as pd
+import streamlit as st
+
+from sfkit import governor
+from sfkit.arrow_io import report_parquet_payloads
+from sfkit.fetch import fetch_report, fetch_reports, latency_summary, parsing
+from sfkit.listing import page_of
+
+LIST_PAGE_SIZES = [50, 200, 1000]
+
+
+def render_listing(index, key):
+    """Browse a listing index one page at a time; search runs on the local index."""
+    built = time.strftime("%Y-%m-%d %H:%M", time.localtime(index.built_at))
+    st.caption(f"{len(index)} {index.kind} in the local index (built {built}).")
+    matches = index.search(st.text_input(f"🔎 Search by {index.name_field.lower()}, ID or folder", key=f"{key}_search"))
+    col1, col2 = st.columns(2)
+    page_size = col1.selectbox("Rows per page", LIST_PAGE_SIZES, key=f"{key}_page_size")
+    pages = max(1, -(-len(matches) // page_size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = col2.number_input(f"Page (of {pages}, {len(matches)} matches)", 1, pages, key=f"{key}_page")
+    st.dataframe(page_of(matches, page, page_size)[0], hide_index=True)
+    st.download_button("📥 Download JSON", lambda: json.dumps(index.records(), indent=4),
+                       f"list_of_{index.kind}.json", "application/json")
+
+
+def render_governor_sidebar(instance_url):
+    """Sidebar counters of the API governor: retries, throttle waits and remaining daily API calls."""
+    api_stats = governor.summary()
+    remaining = governor.remaining_api_calls(instance_url) if instance_url else None
+    st.sidebar.header("🚦 API Governor")
+    st.sidebar.caption(
+        f"Requests: {api_stats['requests']} · Retries: {api_stats['retries']} · "
+        f"Throttle waits: {api_stats['throttle_waits']} ({api_stats['throttle_seconds']}s) · "
+        f"Retry budget exhausted: {api_stats['budget_exhausted']} · "
+        f"Daily limit hit: {api_stats['limit_exceeded']}"
+    )
+    st.sidebar.caption(f"API calls remaining today: {remaining if remaining is not None else 'unknown'}")
+
+
+def render_fetch_results(results, wall_seconds):
+    """Latency summary, per-report status table and one expander per parsed report (ParsedReports)."""
+    summary = latency_summary(results, wall_seconds)
+    st.success(f"✅ {summary['succeeded']} of {summary['reports']} reports in {summary['wall_seconds']}s "
+               f"(p50 {summary['p50_seconds']}s · p95 {summary['p95_seconds']}s · "
+               f"{summary['reports_per_second']} reports/s)")
+    st.dataframe(pd.DataFrame({
+        "Report ID": [result.report_id for result in results],
+        "Status": ["OK" if result.error is None else result.error for result in results],
+        "Seconds": [round(result.seconds, 3) for result in results],
+        "Rows": [len(result.frame) if result.frame is not None else 0 for result in results],
+    }))
+
+    for result in results:
+        if result.frame is not None:
+            with st.expander(f"📄 {result.name} ({result.report_id})"):
+                st.dataframe(result.frame)
+
+
+def render_multi_fetch(access_token, instance_url, report_ids, concurrency):
+    """Fetch many reports concurrently with a progress bar, parsing each one as it arrives."""
+    progress = st.progress(0.0, text=f"Fetching {len(report_ids)} reports...")
+    results = []
+    started = time.perf_counter()
+    for result in fetch_reports(access_token, instance_url, report_ids, concurrency=concurrency,
+                                fetch=parsing(fetch_report)):
+        results.append(result)
+        progress.progress(len(results) / len(report_ids),
+                          text=f"{len(results)}/{len(report_ids)} done · last {result.report_id} in {result.seconds:.2f}s")
+
+    render_fetch_results(results, time.perf_counter() - started)
+
+
+def render_parquet_downloads(report, key, value_key="value"):
+    """Parquet download buttons (details + aggregates); each file is built only when its button is
+    clicked.  Hidden, with a hint, when pyarrow is not installed."""
+    payloads = report_parquet_payloads(report, value_key)
+    if not payloads and report.get("factMap"):
+        st.caption("📦 Parquet export needs pyarrow: pip install pyarrow")
+    report_id = report.get("attributes", {}).get("reportId") or "report"
+    for name, build in payloads.items():
+        st.download_button(
+            label=f"📦 Download {name} (Parquet)",
+            data=build,
+            file_name=f"{report_id}_{name}.parquet",
+            mime="application/vnd.apache.parquet",
+            key=f"{key}_{name}_parquet"
+        )
@@ -0,0 +1,34 @@
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.jqstream import parse_stream_path, stream_items
+
+
+def items(document, path):
+    return list(stream_items(io.BytesIO(json.dumps(document).encode()), path))
+
+
+def test_factmap_rows():
+    document = {"factMap": {"0!T": {"rows": [{"dataCells": [1]}, {"dataCells": [2]}]}, "T!T": {"rows": []}}}
+    assert items(document, ".factMap[].rows[]") == [{"dataCells": [1]}, {"dataCells": [2]}]
+
+
+def test_quoted_key_with_dot():
+    document = {"x.y": [1, 2], "x": {"y": [3]}}
+    assert items(document, '."x.y"[]') == [1, 2]
+    assert items(document, ".x.y[]") == [3]
+
+
+def test_non_ascii_quoted_key():
+    assert parse_stream_path('."café"') == ["café"]
+    assert items({"café": {"n": 1}}, '."café".n') == [1]
+
+
+def test_key_named_item_does_not_match_array_elements():
+    document = {"a": [{"b": 1}, {"b": 2}], "c": {"item": {"b": 3}}}
+    assert items(document, ".a.item.b") == []
+    assert items(document, ".c.item.b") == [3]
+    assert items(document, ".a[].b") == [1, 2]
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.reportdiff import changed_row_count, diff_aggregates, diff_frames
+
+
+def test_repeated_keys_count_as_separate_changed_rows():
+    old = pd.DataFrame({"Id": ["a", "a", "b"], "Amount": [1, 2, 3]})
+    new = pd.DataFrame({"Id": ["a", "a", "b"], "Amount": [10, 20, 3]})
+    added, removed, changed = diff_frames(old, new, ["Id"])
+    assert added.empty and removed.empty
+    assert list(changed["Occurrence"]) == [0, 1]
+    assert changed_row_count(changed, ["Id"]) == 2
+
+
+def test_aggregate_diff_has_no_occurrence_column():
+    old = pd.DataFrame({"Grouping": ["0", "T"], "Sum": [1.0, 1.0]})
+    new = pd.DataFrame({"Grouping": ["0", "T"], "Sum": [2.0, 2.0]})
+    changes = diff_aggregates(old, new)
+    assert "Occurrence" not in changes.columns
+    assert list(changes["Change"]) == ["changed", "changed"]
@@ -1,44 +1,55 @@
 import streamlit as st
-import requests
 import os
 import json
+import time
 from streamlit_ace import st_ace
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.client import api_get, stream_to_file
+from sfkit.exportstore import file_contents, get_store
+from sfkit.fetch import DEFAULT_CONCURRENCY, parse_report_ids
+from sfkit.httpcache import cached_get
+from sfkit.listing import build_index, load_index
+from sfkit.ui import render_governor_sidebar, render_listing, render_multi_fetch
+
+DESCRIBE_TTL = 3600  # seconds a cached describe response is served without revalidation
+REPORT_TYPES_TTL = 24 * 3600
+MAX_PICK_OPTIONS = 1000  # keeps the multiselect responsive on very large orgs
+
+# Exports are stored once per distinct payload, with bounded history per report
+export_store = get_store("downloads")
 
 # Function to fetch the Excel report from Salesforce
 def get_excel_report(access_token, instance_url, report_id):
     try:
         url = f"{instance_url}/services/data/v60.0/analytics/reports/{report_id}"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Accept": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        }
+        headers = {"Accept": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
 
-        response = requests.get(url, headers=headers)
+        response = api_get(access_token, instance_url, url, headers=headers, stream=True)
 
         if response.status_code == 200:
             content_disposition = response.headers.get("Content-Disposition", "")
             filename = "Salesforce_Report.xlsx"
             if "filename=" in content_disposition:
-                filename = content_disposition.split("filename=")[-1].strip('"')
+                filename = os.path.basename(content_disposition.split("filename=")[-1].strip('"'))
 
-            file_path = os.path.join("downloads", filename)
-            os.makedirs("downloads", exist_ok=True)
-            with open(file_path, "wb") as file:
-                file.write(response.content)
+            # Stream the body to disk in chunks, then file it by content hash
+            incoming_path = export_store.temp_path(os.path.splitext(filename)[1])
+            stream_to_file(response, incoming_path)
+            file_path, duplicate = export_store.add(report_id, incoming_path, filename)
 
-            return file_path, filename
+            return file_path, filename, duplicate
         else:
-            return None, f"Error: {response.status_code} - {response.text}"
+            return None, f"Error: {response.status_code} - {response.text}", False
     except Exception as e:
-        return None, f"Exception: {str(e)}"
+        return None, f"Exception: {str(e)}", False
 
 # Function to describe the report structure
-def describe_report(access_token, instance_url, report_id):
+def describe_report(access_token, instance_url, report_id, force_refresh=False):
     try:
         url = f"{instance_url}/services/data/v60.0/analytics/reports/{report_id}/describe"
-        headers = {"Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = cached_get(access_token, instance_url, url, ttl=DESCRIBE_TTL, force_refresh=force_refresh)
 
         if response.status_code == 200:
             return response.json()
@@ -51,9 +62,8 @@ def describe_report(access_token, instance_url, report_id):
 def get_report_details(access_token, instance_url, report_id):
     try:
         url = f"{instance_url}/services/data/v60.0/analytics/reports/{report_id}?includeDetails=true"
-        headers = {"Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = api_get(access_token, instance_url, url)
 
         if response.status_code == 200:
             return response.json()
@@ -63,28 +73,20 @@ def get_report_details(access_token, instance_url, report_id):
         return {"error": str(e)}
 
 
-# Function to get the list of reports
-def list_reports(access_token, instance_url):
+# Function to get the list of reports (every report in the org, from the local index unless rebuilt)
+def list_reports(access_token, instance_url, rebuild=False, progress=None):
     try:
-        url = f"{instance_url}/services/data/v60.0/analytics/reports"
-        headers = {"Authorization": f"Bearer {access_token}"}
-
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": f"Error: {response.status_code} - {response.text}"}
+        index = None if rebuild else load_index(access_token, instance_url, "reports")
+        return index or build_index(access_token, instance_url, "reports", progress=progress)
     except Exception as e:
         return {"error": str(e)}
 
 # Function to get the list of report types
-def get_report_types(access_token, instance_url):
+def get_report_types(access_token, instance_url, force_refresh=False):
     try:
         url = f"{instance_url}/services/data/v60.0/analytics/reportTypes"
-        headers = {"Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = cached_get(access_token, instance_url, url, ttl=REPORT_TYPES_TTL, force_refresh=force_refresh)
 
         if response.status_code == 200:
             return response.json()
@@ -104,25 +106,46 @@ instance_url = st.text_input("🌐 Instance URL", value="https://your-instance.s
 report_id = st.text_input("📄 Report ID : 00Oxxxx")
 
 # Options
-option = st.radio("Select an action:", ["List of Reports", "Download Excel", "Describe Report", "Get Report Details", "Get List of Report Types"])
+option = st.radio("Select an action:", ["List of Reports", "Download Excel", "Describe Report", "Get Report Details", "Get List of Report Types", "Fetch Multiple Reports"])
+
+if option == "Fetch Multiple Reports":
+    # Reports from the "List of Reports" index can be picked here; IDs can also be pasted
+    report_index = st.session_state.get("report_index")
+    report_choices = {}
+    if report_index is not None:
+        report_filter = st.text_input("🔎 Filter the report index", "")
+        report_choices = report_index.choices(report_index.search(report_filter).head(MAX_PICK_OPTIONS))
+    picked = st.multiselect("📚 Pick from the report index", list(report_choices))
+    pasted = st.text_area("📄 Or paste Report IDs (one per line or comma-separated)", "")
+    multi_report_ids = parse_report_ids(" ".join([report_choices[name] for name in picked] + [pasted]))
+    concurrency = st.slider("⚙️ Max concurrent requests", 1, 16, DEFAULT_CONCURRENCY,
+                            help="Keep this low enough to stay inside your org's concurrent API limits.")
+
+if option in ("Describe Report", "Get List of Report Types"):
+    # Metadata endpoints are served from the on-disk cache unless refreshed
+    force_refresh = st.checkbox("🔄 Force refresh (bypass the metadata cache)", value=False)
+
+if option == "List of Reports":
+    rebuild_index = st.checkbox("🔄 Rebuild the local report index", value=False,
+                                help="The first listing downloads every report page by page; later ones reuse the saved index.")
 
 if st.button("Execute"):
     if access_token and instance_url :
         if option == "List of Reports":   
-            list_of_reports = list_reports(access_token, instance_url)
+            progress = st.empty()
+            list_of_reports = list_reports(access_token, instance_url, rebuild_index,
+                                           progress=lambda count: progress.caption(f"Indexed {count} reports..."))
+            progress.empty()
+            if isinstance(list_of_reports, dict):
+                st.error(list_of_reports["error"])
+            else:
+                st.session_state["report_index"] = list_of_reports
 
-            # Display JSON with streamlit_ace
-            st.subheader("📑 List of Reports(JSON)")
-            json_text = json.dumps(list_of_reports, indent=4)
-            # Provide JSON download button
-            json_filename = "list_of_reports.json"
-            st.download_button(
-                label="📥 Download JSON",
-                data=json_text,
-                file_name=json_filename,
-                mime="application/json"
-            )
-            st_ace(value=json_text, language="json", theme="monokai", readonly=True)
+        elif option == "Fetch Multiple Reports":
+            if multi_report_ids:
+                render_multi_fetch(access_token, instance_url, multi_report_ids, concurrency)
+            else:
+                st.warning("⚠️ Pick or paste at least one Report ID.")
     else :
         st.warning("⚠️ Please enter Access Token and Instance URL.")
 
@@ -130,12 +153,18 @@ if st.button("Execute"):
 
     if access_token and instance_url and report_id and option != "List of Reports":
         if option == "Download Excel":
-            file_path, message = get_excel_report(access_token, instance_url, report_id)
+            started = time.perf_counter()
+            file_path, message, duplicate = get_excel_report(access_token, instance_url, report_id)
             if file_path:
-                st.success("✅ Report generated successfully!")
+                size_mb = os.path.getsize(file_path) / 2**20
+                seconds = time.perf_counter() - started
+                st.success(f"✅ Report generated successfully! {size_mb:.2f} MB in {seconds:.1f}s "
+                           f"({size_mb / max(seconds, 1e-6):.2f} MB/s)")
+                st.caption(("Identical to the latest stored export, not saved again. " if duplicate else "")
+                           + f"{len(export_store.versions(report_id))} stored version(s) of this report.")
                 st.download_button(
                     label="📥 Download Excel Report",
-                    data=open(file_path, "rb"),
+                    data=file_contents(file_path),  # Read from disk on click, not on every rerun
                     file_name=message,
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
@@ -145,7 +174,7 @@ if st.button("Execute"):
        
 
         elif option == "Describe Report":
-            report_description = describe_report(access_token, instance_url, report_id)
+            report_description = describe_report(access_token, instance_url, report_id, force_refresh)
 
             # Display JSON with streamlit_ace
             st.subheader("📑 Report Description (JSON)")
@@ -180,7 +209,7 @@ if st.button("Execute"):
 
            
         elif option == "Get List of Report Types":
-            report_types = get_report_types(access_token, instance_url)
+            report_types = get_report_types(access_token, instance_url, force_refresh)
 
             # Display JSON with streamlit_ace
             st.subheader("📄 List of Report Types (JSON)")
@@ -196,4 +225,12 @@ if st.button("Execute"):
             )
             st_ace(value=json_text, language="json", theme="monokai", readonly=True)
 
-    #else: st.warning("⚠️ Please enter all required fields.")
\ No newline at end of file
+    #else: st.warning("⚠️ Please enter all required fields.")
+
+# The report index stays browsable across reruns (search, paging) without pressing Execute again
+if option == "List of Reports" and st.session_state.get("report_index") is not None:
+    st.subheader("📑 List of Reports")
+    render_listing(st.session_state["report_index"], "reports")
+
+# Sidebar - API governor counters (retries, throttle waits, remaining daily API calls)
+render_governor_sidebar(instance_url)
@@ -1,8 +1,19 @@
 import streamlit as st
-import requests
 import os
 import json
+import time
 from streamlit_ace import st_ace
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for sfkit
+from sfkit.client import api_get, stream_to_file
+from sfkit.exportstore import file_contents, get_store
+from sfkit.httpcache import cached_get
+
+DESCRIBE_TTL = 3600  # seconds a cached describe response is served without revalidation
+REPORT_TYPES_TTL = 24 * 3600
+
+# Exports are stored once per distinct payload, with bounded history per report
+export_store = get_store("downloads")
 
 # Function to load credentials from access.json
 def load_credentials():
@@ -22,37 +33,33 @@ def get_api_url(instance_url, api_version, endpoint):
 def get_excel_report(access_token, instance_url, api_version, report_id):
     try:
         url = get_api_url(instance_url, api_version, f"analytics/reports/{report_id}")
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Accept": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        }
+        headers = {"Accept": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
 
-        response = requests.get(url, headers=headers)
+        response = api_get(access_token, instance_url, url, headers=headers, stream=True)
 
         if response.status_code == 200:
             content_disposition = response.headers.get("Content-Disposition", "")
             filename = "Salesforce_Report.xlsx"
             if "filename=" in content_disposition:
-                filename = content_disposition.split("filename=")[-1].strip('"')
+                filename = os.path.basename(content_disposition.split("filename=")[-1].strip('"'))
 
-            file_path = os.path.join("downloads", filename)
-            os.makedirs("downloads", exist_ok=True)
-            with open(file_path, "wb") as file:
-                file.write(response.content)
+            # Stream the body to disk in chunks, then file it by content hash
+            incoming_path = export_store.temp_path(os.path.splitext(filename)[1])
+            stream_to_file(response, incoming_path)
+            file_path, duplicate = export_store.add(report_id, incoming_path, filename)
 
-            return file_path, filename
+            return file_path, filename, duplicate
         else:
-            return None, f"Error: {response.status_code} - {response.text}"
+            return None, f"Error: {response.status_code} - {response.text}", False
     except Exception as e:
-        return None, f"Exception: {str(e)}"
+        return None, f"Exception: {str(e)}", False
 
 # Function to describe the report structure
-def describe_report(access_token, instance_url, api_version, report_id):
+def describe_report(access_token, instance_url, api_version, report_id, force_refresh=False):
     try:
         url = get_api_url(instance_url, api_version, f"analytics/reports/{report_id}/describe")
-        headers = {"Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = cached_get(access_token, instance_url, url, ttl=DESCRIBE_TTL, force_refresh=force_refresh)
 
         if response.status_code == 200:
             return response.json()
@@ -65,9 +72,8 @@ def describe_report(access_token, instance_url, api_version, report_id):
 def get_report_details(access_token, instance_url, api_version, report_id):
     try:
         url = get_api_url(instance_url, api_version, f"analytics/reports/{report_id}?includeDetails=true")
-        headers = {"Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = api_get(access_token, instance_url, url)
 
         if response.status_code == 200:
             return response.json()
@@ -80,9 +86,8 @@ def get_report_details(access_token, instance_url, api_version, report_id):
 def list_reports(access_token, instance_url, api_version):
     try:
         url = get_api_url(instance_url, api_version, "analytics/reports")
-        headers = {"Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = api_get(access_token, instance_url, url)
 
         if response.status_code == 200:
             return response.json()
@@ -92,12 +97,11 @@ def list_reports(access_token, instance_url, api_version):
         return {"error": str(e)}
 
 # Function to get the list of report types
-def get_report_types(access_token, instance_url, api_version):
+def get_report_types(access_token, instance_url, api_version, force_refresh=False):
     try:
         url = get_api_url(instance_url, api_version, "analytics/reportTypes")
-        headers = {"Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = cached_get(access_token, instance_url, url, ttl=REPORT_TYPES_TTL, force_refresh=force_refresh)
 
         if response.status_code == 200:
             return response.json()
@@ -123,6 +127,9 @@ option = st.radio("Select an action:", [
     "Get Report Details", "Get List of Report Types"
 ])
 
+# Metadata endpoints are served from the on-disk cache unless refreshed
+force_refresh = st.checkbox("🔄 Force refresh (bypass the metadata cache)", value=False)
+
 if st.button("Execute"):
     if not access_token or not instance_url:
         st.warning("⚠️ Unable to read `access.json`. Ensure it contains valid credentials.")
@@ -136,18 +143,24 @@ if st.button("Execute"):
 
         elif report_id:
             if option == "Download Excel":
-                file_path, message = get_excel_report(access_token, instance_url, api_version, report_id)
+                started = time.perf_counter()
+                file_path, message, duplicate = get_excel_report(access_token, instance_url, api_version, report_id)
                 if file_path:
-                    st.success("✅ Report generated successfully!")
+                    size_mb = os.path.getsize(file_path) / 2**20
+                    seconds = time.perf_counter() - started
+                    st.success(f"✅ Report generated successfully! {size_mb:.2f} MB in {seconds:.1f}s "
+                               f"({size_mb / max(seconds, 1e-6):.2f} MB/s)")
+                    st.caption(("Identical to the latest stored export, not saved again. " if duplicate else "")
+                               + f"{len(export_store.versions(report_id))} stored version(s) of this report.")
                     st.download_button(
-                        "📥 Download Excel Report", open(file_path, "rb"), 
+                        "📥 Download Excel Report", file_contents(file_path), 
                         file_name=message, mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                     )
                 else:
                     st.error(message)
 
             elif option == "Describe Report":
-                description = describe_report(access_token, instance_url, api_version, report_id)
+                description = describe_report(access_token, instance_url, api_version, report_id, force_refresh)
                 json_text = json.dumps(description, indent=4)
                 st.subheader("📑 Report Description (JSON)")
                 st.download_button("📥 Download JSON", json_text, "report_description.json", "application/json")
@@ -161,7 +174,7 @@ if st.button("Execute"):
                 st_ace(value=json_text, language="json", theme="monokai", readonly=True)
 
         elif option == "Get List of Report Types":
-            report_types = get_report_types(access_token, instance_url, api_version)
+            report_types = get_report_types(access_token, instance_url, api_version, force_refresh)
             json_text = json.dumps(report_types, indent=4)
             st.subheader("📄 List of Report Types (JSON)")
             st.download_button("📥 Download JSON", json_text, "report_types.json", "application/json")